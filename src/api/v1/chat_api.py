@@ -11,26 +11,31 @@ from pathlib import Path
 from typing import Any, Dict, Optional, AsyncGenerator
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, Query
 from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from src.api.v1.schemas import ChatQuery, ChatResponse, ClearChatResponse
-from src.services.chat_service import get_chatbot_service_async
+from src.services.chat_service import ChatbotService, get_chatbot_service_async
 
 router = APIRouter()
 
 
+async def get_chatbot() -> ChatbotService:
+    """Dependency providing the shared chatbot service."""
+    return await get_chatbot_service_async()
+
+
 @router.post("/chat-stream")
-async def chat_stream(query: ChatQuery):
+async def chat_stream(query: ChatQuery, chatbot: ChatbotService = Depends(get_chatbot)):
     """Process a chat query and stream the response."""
+    # A blank query has nothing to answer; reject it before any model call
+    if not query.query.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    
     try:
-        # Get the singleton chatbot service
-        chatbot = await get_chatbot_service_async()
-        
-        logger.info(f"Session ID: {query.session_id}")
-        logger.info(f"Query: {query.query}")
-        logger.info(f"Request from user: {query.user_id if hasattr(query, 'user_id') else 'Unknown'}")
+        logger.info(f"Chat request for session {query.session_id} from user {query.user_id if hasattr(query, 'user_id') else 'Unknown'}")
+        logger.debug("Query: {}", query.query)
 
         # Use the session_id from the query
         response_stream = await chatbot.automation_flow_stream(
@@ -45,10 +50,12 @@ async def chat_stream(query: ChatQuery):
 
 
 @router.post("/clear-chat", response_model=ClearChatResponse)
-async def clear_chat(session_id: str = Query(..., description="Session ID to clear")):
+async def clear_chat(
+    session_id: str = Query(..., description="Session ID to clear"),
+    chatbot: ChatbotService = Depends(get_chatbot),
+):
     """Clear the conversation history for a specific chat session."""
     try:
-        chatbot = await get_chatbot_service_async()
         success = await chatbot.clear_session(session_id)
         
         if success:
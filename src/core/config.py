@@ -45,6 +45,8 @@ class Settings:
         self.RAW_PDF_DIR.mkdir(exist_ok=True)
         self.CONVERTED_FILE_DIR = DATA_DIR / "converted_file"
         self.CONVERTED_FILE_DIR.mkdir(exist_ok=True)
+        self.LLM_CACHE_DIR = DATA_DIR / "llm_cache"
+        self.LLM_CACHE_DIR.mkdir(exist_ok=True)
         
         # CORS settings
         self.CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
@@ -67,6 +69,9 @@ class LLMConfig:
         self.temperature = float(os.getenv("LLM_TEMPERATURE", "0.2"))
         self.top_p = float(os.getenv("LLM_TOP_P", "0.95"))
         self.top_k = int(os.getenv("LLM_TOP_K", "40"))
+        # PDF extraction batching; bounded by the model's output token limit, not its context window
+        self.extraction_batch_pages = int(os.getenv("EXTRACTION_BATCH_PAGES", "4"))
+        self.extraction_whole_file_max_pages = int(os.getenv("EXTRACTION_WHOLE_FILE_MAX_PAGES", "5"))
 
 
 # Create a global LLMConfig instance
@@ -80,7 +80,7 @@ class LLMKeyManager:
         # Update usage tracking
         self.key_usage_count[key] += 1
         self.last_used_time[key] = current_time
-        logger.info(f"Using key: {key[:10]}... (usage count: {self.key_usage_count[key]})")
+        logger.debug("Using key: {}... (usage count: {})", key[:10], self.key_usage_count[key])
         return key
     
     def get_least_used_key(self) -> str:
@@ -81,43 +81,57 @@ def get_system_instruction() -> str:
     return SYSTEM_INSTRUCTION
 
 
+# Static delimiters for prompts that embed large report/document text; prompts
+# are assembled as a list of parts and joined once so the document is copied
+# a single time
+_REPORTS_OPEN = "[FINANCIAL REPORTS]\n"
+_REPORTS_CLOSE = "\n[/FINANCIAL REPORTS]"
+_STOCK_PRICE_OPEN = "\n[STOCK_PRICE]\n"
+_STOCK_PRICE_CLOSE = "\n[/STOCK_PRICE]"
+_CTX_OPEN = "[CONTEXT]\n"
+_CTX_CLOSE = "\n[/CONTEXT]"
+_HISTORY_OPEN = "[CONTEXT]\nPrevious conversation:\n"
+
+
 def build_prompt_with_financial_reports(report_content: str, query: str, conversation_history: List[str] = None, stock_price_info: Optional[str] = None) -> str:
     """Build prompt string with financial report content."""
-    financial_reports = f"""[FINANCIAL REPORTS]\n{report_content}\n[/FINANCIAL REPORTS]"""
     prompt_prefix = "Based on the financial reports provided, please answer the following question:"
 
+    parts = [_REPORTS_OPEN, report_content, _REPORTS_CLOSE]
     if stock_price_info:
-        financial_reports += f"\n[STOCK_PRICE]\n{stock_price_info}\n[/STOCK_PRICE]"
+        parts += [_STOCK_PRICE_OPEN, stock_price_info, _STOCK_PRICE_CLOSE]
+    parts.append("\n\n")
 
-    conversation_context = ""
     if conversation_history:
-        conversation_context = f"""[CONTEXT]\nPrevious conversation:\n{chr(10).join(conversation_history)}\n[/CONTEXT]\n"""
-    
-    return f"""{financial_reports}\n\n{conversation_context}{prompt_prefix}\n{query}\n\nIf the financial reports don't contain information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."""
+        parts += [_HISTORY_OPEN, "\n".join(conversation_history), _CTX_CLOSE, "\n"]
+
+    parts += [prompt_prefix, "\n", query, "\n\nIf the financial reports don't contain information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."]
+    return "".join(parts)
 
 
 def build_prompt_with_financial_reports_and_history(statement_content: str, query: str, conversation_history: List[str] = None) -> str:
     """Build prompt string with both financial reports and document context."""
-    financial_reports = f"""[FINANCIAL REPORTS]\n{statement_content}\n[/FINANCIAL REPORTS]"""
-
     prompt_prefix = "Based on the financial reports and additional context provided, please answer the following question:"
 
-    conversation_context = ""
+    parts = [_REPORTS_OPEN, statement_content, _REPORTS_CLOSE, "\n\n"]
     if conversation_history:
-        conversation_context = f"""[CONTEXT]\nPrevious conversation:\n{chr(10).join(conversation_history)}\n[/CONTEXT]\n"""
+        parts += [_HISTORY_OPEN, "\n".join(conversation_history), _CTX_CLOSE, "\n"]
 
-    return f"""{financial_reports}\n\n{conversation_context}{prompt_prefix}\n{query}\n\nIf neither the financial reports nor the context contains information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."""
+    parts += [prompt_prefix, "\n", query, "\n\nIf neither the financial reports nor the context contains information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."]
+    return "".join(parts)
 
 
 def build_prompt_with_context(document_content: str, query: str, conversation_history: List[str] = None) -> str:
     """Build prompt string with document context."""
-    context = f"""[CONTEXT]\n{document_content}\n[/CONTEXT]"""
-    prompt_prefix = "Based on the above context, please answer the following question:"
     if conversation_history:
-        context = f"""[CONTEXT]\nPrevious conversation:\n{chr(10).join(conversation_history)}\n[/CONTEXT]"""
+        parts = [_HISTORY_OPEN, "\n".join(conversation_history), _CTX_CLOSE]
         prompt_prefix = "Based on the previous conversation, answer the following question:"
+    else:
+        parts = [_CTX_OPEN, document_content, _CTX_CLOSE]
+        prompt_prefix = "Based on the above context, please answer the following question:"
 
-    return f"""{context}\n{prompt_prefix}\n{query}\n\nIf neither the context nor the previous conversation contains information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."""
+    parts += ["\n", prompt_prefix, "\n", query, "\n\nIf neither the context nor the previous conversation contains information about this question but it's a general financial concept, please provide a helpful answer based on your financial knowledge."]
+    return "".join(parts)
 
 
 def build_prompt_without_context(query: str, conversation_history: List[str] = None) -> str:
@@ -190,6 +204,18 @@ def build_prompt_for_extract_stock_symbol(query: str) -> str:
 
 from typing import List, Optional
 
+# Fixed per-turn instruction placed at the top of every automation prompt
+AUTOMATION_TURN_INSTRUCTION = (
+    "Based on the chat history (if provided) and the current query, please provide a helpful response. "
+    "Use your available tools if necessary to gather or verify information."
+)
+# Static delimiters around the per-turn content; the instruction above and the
+# history block keep the prompt prefix identical from one turn to the next
+_CHAT_HISTORY_OPEN = "\n\n[CHAT HISTORY]\n"
+_CHAT_HISTORY_CLOSE = "\n[/CHAT HISTORY]"
+_CURRENT_QUERY_OPEN = "\n\n[CURRENT QUERY]\n"
+_CURRENT_QUERY_CLOSE = "\n[/CURRENT QUERY]"
+
 def build_prompt_with_tools_for_automation(query: str, conversation_history: Optional[List[str]] = None) -> str:
     """
     Builds the user message prompt for the agent, focusing on the query and conversation history.
@@ -207,27 +233,17 @@ def build_prompt_with_tools_for_automation(query: str, conversation_history: Opt
     Returns:
         A formatted string to be used as the content of the user message sent to the agent.
     """
-    prompt_parts = []
-
-    # Add a concise instruction guiding the agent for this specific turn.
-    prompt_parts.append(
-        "Based on the chat history (if provided) and the current query, please provide a helpful response. "
-        "Use your available tools if necessary to gather or verify information."
-    )
+    # Start with the concise instruction guiding the agent for this turn.
+    prompt_parts = [AUTOMATION_TURN_INSTRUCTION]
 
     # Include conversation history if available, clearly demarcated.
     if conversation_history:
         # Join the history turns. Consider adding prefixes like "User:"/"Assistant:"
         # if the history list doesn't already include them and the model benefits from it.
-        history_str = "\n".join(conversation_history)
-        prompt_parts.append(f"""[CHAT HISTORY]
-{history_str}
-[/CHAT HISTORY]""")
+        prompt_parts += [_CHAT_HISTORY_OPEN, "\n".join(conversation_history), _CHAT_HISTORY_CLOSE]
 
     # Include the current user query, clearly demarcated.
-    prompt_parts.append(f"""[CURRENT QUERY]
-{query}
-[/CURRENT QUERY]""")
+    prompt_parts += [_CURRENT_QUERY_OPEN, query, _CURRENT_QUERY_CLOSE]
 
-    # Combine the parts into a single string with clear separation.
-    return "\n\n".join(prompt_parts)
+    # Combine the parts into a single string in one copy.
+    return "".join(prompt_parts)
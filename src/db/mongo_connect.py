@@ -40,11 +40,21 @@ class Database:
         logger.debug(f"Accessing database: {self.name}")
         return self.client[self.name]
 
-db = Database()
+# Created on first use rather than at import, so importing the app does not
+# require MONGO_CONN_STR or open a connection pool in every worker up front
+_database: Database = None
+
+def get_db() -> Database:
+    """Get the shared Database instance, creating it on first call"""
+    global _database
+    if _database is None:
+        _database = Database()
+    return _database
 
 async def main():
     """Test the database configuration"""
     try:
+        db = get_db()
         logger.debug(f"Database URI: {db.uri}")
         logger.debug(f"Database name: {db.name}")
         db.connect_db()
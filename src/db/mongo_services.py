@@ -1,8 +1,8 @@
 # Import required modules
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from bson import ObjectId
 from datetime import datetime
-from src.db.mongo_connect import db
+from src.db.mongo_connect import get_db
 from src.api.v1.schemas import FinancialReport
 from fastapi import HTTPException
 from pymongo.errors import DuplicateKeyError
@@ -12,12 +12,16 @@ from loguru import logger
 import base64
 import hashlib
 import asyncio
+import re
 
 # Initialize logger
 
+# Lightweight fields for report listings; excludes the full report content
+REPORT_SUMMARY_FIELDS = ("report_id", "company", "type", "period", "date_created", "status", "tags")
+
 class MongoService:
     def __init__(self):
-        self._database = db.db
+        self._database = get_db().db
         self._indexes_ensured = False
         logger.debug("MongoService initialized")
 
@@ -39,6 +43,8 @@ class MongoService:
         await self._database.financial_reports.create_index([("status", ASCENDING)])
         await self._database.financial_reports.create_index([("tags", ASCENDING)])
         await self._database.financial_reports.create_index([("content", TEXT)])
+        # Supports keyset pagination over the default listing order
+        await self._database.financial_reports.create_index([("date_created", DESCENDING), ("_id", DESCENDING)])
         
         # Add indexes for user collection if needed
         await self._database.users.create_index([("email", ASCENDING)], unique=True)
@@ -168,13 +174,63 @@ class MongoService:
     
     # Query operations
     
+    def _find_page(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]],
+        skip: int,
+        limit: int,
+        sort_field: str,
+        sort_order: int,
+        after: Optional[Tuple[Any, ObjectId]]
+    ):
+        """
+        Build a sorted, paginated cursor over financial reports
+        
+        When `after` is given, the page starts right after that
+        (sort value, _id) pair using a range condition on the index instead
+        of making the server walk and discard `skip` documents.
+        """
+        if after is not None:
+            last_value, last_id = after
+            op = "$lt" if sort_order < 0 else "$gt"
+            seek = {"$or": [
+                {sort_field: {op: last_value}},
+                {sort_field: last_value, "_id": {op: last_id}},
+            ]}
+            query = {"$and": [query, seek]} if query else seek
+        
+        cursor = self._database.financial_reports.find(query, projection)
+        cursor = cursor.sort([(sort_field, sort_order), ("_id", sort_order)])
+        if skip:
+            cursor = cursor.skip(skip)
+        return cursor.limit(limit)
+    
+    @staticmethod
+    def next_page_cursor(reports: List[Dict[str, Any]], sort_field: str = "date_created") -> Optional[Tuple[Any, ObjectId]]:
+        """
+        Get the cursor to pass as `after` for the page following `reports`
+        
+        Args:
+            reports: Page of documents returned by a listing method
+            sort_field: Field the page was sorted by
+            
+        Returns:
+            Optional[Tuple]: (sort value, _id) of the last document, or None if the page is empty
+        """
+        if not reports:
+            return None
+        last = reports[-1]
+        return last.get(sort_field), last["_id"]
+    
     async def list_financial_reports(
         self, 
         skip: int = 0, 
         limit: int = 100,
         sort_field: str = "date_created",
         sort_order: int = -1,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        after: Optional[Tuple[Any, ObjectId]] = None
     ) -> List[Dict[str, Any]]:
         """
         List financial reports with optional filtering and sorting
@@ -185,14 +241,52 @@ class MongoService:
             sort_field: Field to sort by
             sort_order: Sort direction (1 for ascending, -1 for descending)
             filters: Optional query filters
+            after: Optional keyset cursor from next_page_cursor; prefer it over skip for deep pages
             
         Returns:
             List[Dict]: List of financial report documents
         """
         query = filters or {}
         
-        cursor = self._database.financial_reports.find(query)
-        cursor = cursor.sort(sort_field, sort_order).skip(skip).limit(limit)
+        cursor = self._find_page(query, None, skip, limit, sort_field, sort_order, after)
+        
+        reports = await cursor.to_list(length=limit)
+        return reports
+    
+    async def list_financial_report_summaries(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        sort_field: str = "date_created",
+        sort_order: int = -1,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Sequence[str] = REPORT_SUMMARY_FIELDS,
+        after: Optional[Tuple[Any, ObjectId]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        List financial reports returning only the requested fields
+        
+        Use this for listings that do not need the report body; the
+        projection keeps the potentially large content field off the wire.
+        
+        Args:
+            skip: Number of documents to skip
+            limit: Maximum number of documents to return
+            sort_field: Field to sort by
+            sort_order: Sort direction (1 for ascending, -1 for descending)
+            filters: Optional query filters
+            fields: Fields to include in each returned document
+            after: Optional keyset cursor from next_page_cursor; prefer it over skip for deep pages
+            
+        Returns:
+            List[Dict]: List of projected financial report documents
+        """
+        query = filters or {}
+        # Always project the sort field so the page can produce its next cursor
+        projection = {field: 1 for field in fields}
+        projection[sort_field] = 1
+        
+        cursor = self._find_page(query, projection, skip, limit, sort_field, sort_order, after)
         
         reports = await cursor.to_list(length=limit)
         return reports
@@ -236,11 +330,13 @@ class MongoService:
             The financial report document or None if not found
         """
         try:
-            # Create a case-insensitive query for the company symbol
-            # This will match regardless of case (upper, lower, mixed)
-            query = {"company": {"$regex": f"^{symbol}$", "$options": "i"}}
+            # Reports are stored with upper-case symbols and periods (see
+            # DocumentInjector.parse_filename), so an exact match on the
+            # normalized values is served by the company index, unlike a
+            # case-insensitive regex which has to scan
+            query = {"company": symbol.upper()}
             if period:
-                query["period"] = {"$regex": f"^{period}$", "$options": "i"}
+                query["period"] = period.upper()
             
             logger.info(f"Searching for financial report with query: {query}")
             report = await self._database.financial_reports.find_one(query)
@@ -249,10 +345,12 @@ class MongoService:
                 logger.info(f"Found financial report for {symbol} ({period})")
                 return report
             else:
-                # Try a more flexible search if exact match fails
-                fallback_query = {"company": {"$regex": symbol, "$options": "i"}}
+                # Try a more flexible search if exact match fails: the symbol still has
+                # to match whole (so "FPT" never returns "FPTS"), only case is ignored
+                # for reports stored before symbols were normalized; the period may be partial
+                fallback_query = {"company": {"$regex": f"^{re.escape(symbol)}$", "$options": "i"}}
                 if period:
-                    fallback_query["period"] = {"$regex": period, "$options": "i"}
+                    fallback_query["period"] = {"$regex": re.escape(period), "$options": "i"}
                 
                 logger.info(f"Trying fallback query: {fallback_query}")
                 report = await self._database.financial_reports.find_one(fallback_query)
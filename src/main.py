@@ -2,6 +2,8 @@
 Main FastAPI application for the finance chatbot backend.
 """
 import argparse
+import asyncio
+import os
 
 import uvicorn
 from fastapi import FastAPI
@@ -22,8 +24,8 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    # call the save_finance_data_cache function
-    save_finance_data_cache(finance_data_cache)
+    # Save the finance data cache in a thread so the loop can finish closing connections
+    await asyncio.to_thread(save_finance_data_cache, finance_data_cache)
     print("Shutting down...")
 
 # Set all CORS enabled origins
@@ -60,9 +62,27 @@ def main():
     parser.add_argument(
         "--port", type=int, default=8000, help="Port to listen on"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", "1")),
+        help="Number of worker processes (defaults to $WEB_CONCURRENCY or 1)",
+    )
+    parser.add_argument(
+        "--reload", action="store_true", help="Reload on code changes (development only)"
+    )
     args = parser.parse_args()
 
-    uvicorn.run(app, host=args.host, port=args.port)
+    # Uvicorn can only spawn workers from an import string, not an app object
+    uvicorn.run(
+        "src.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload,
+        loop="uvloop",
+        http="httptools",
+    )
 
 
 if __name__ == "__main__":
@@ -3,8 +3,11 @@ from __future__ import annotations
 
 import asyncio
 import uuid
-from typing import Dict, List, Optional, AsyncGenerator
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
 
+import cachetools
 from loguru import logger
 from src.services.gemini_client import LLMService, get_llm_service_async
 from src.db.mongo_services import MongoService
@@ -14,6 +17,20 @@ from src.core import prompt
 import json
 from pydantic import BaseModel
 
+# Shared encoder for SSE frames; keeping Vietnamese text unescaped avoids
+# inflating every chunk with \uXXXX sequences
+_sse_encoder = json.JSONEncoder(ensure_ascii=False)
+
+# Number of most recent user/chatbot turns sent back to the model as context
+HISTORY_WINDOW = 8
+# Turns kept per session; older ones are dropped as new ones arrive
+MAX_HISTORY_TURNS = 16
+
+# Idle sessions are evicted after SESSION_TTL seconds, and at most
+# MAX_SESSIONS are kept in memory
+MAX_SESSIONS = 1024
+SESSION_TTL = 3600
+
 class StockSymbol(BaseModel):
     """Stock symbol model."""
     symbol: str
@@ -21,27 +38,39 @@ class StockSymbol(BaseModel):
 class ChatSession:
     """Class representing a single chat session with conversation history."""
     
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, history_window: int = HISTORY_WINDOW):
         self.session_id = session_id
-        self.conversation_history: List[str] = []
+        self.history_window = history_window
+        # (role, text) records; formatted into prompt lines only when needed
+        self.conversation_history: deque[Tuple[str, str]] = deque(maxlen=2 * MAX_HISTORY_TURNS)
         self.history_lock = asyncio.Lock()  # Lock for thread-safe conversation history updates
         logger.info(f"Initialized chat session: {session_id}")
     
     async def add_to_history(self, user_query: str, bot_response: str):
         """Thread-safe method to add interactions to the history."""
         async with self.history_lock:
-            self.conversation_history.append(f"User: {user_query}")
-            self.conversation_history.append(f"Chatbot: {bot_response}")
+            self.conversation_history.append(("User", user_query))
+            self.conversation_history.append(("Chatbot", bot_response))
     
     async def get_history(self):
         """Thread-safe method to get a copy of the conversation history."""
         async with self.history_lock:
-            return self.conversation_history.copy()
+            return list(self.conversation_history)
+    
+    async def get_recent_history(self) -> List[str]:
+        """Thread-safe method to get the last `history_window` turns as prompt lines."""
+        if self.history_window <= 0:
+            return []
+        async with self.history_lock:
+            # Each turn is a user record followed by a chatbot record
+            skip = max(0, len(self.conversation_history) - 2 * self.history_window)
+            recent = list(islice(self.conversation_history, skip, None))
+        return [f"{role}: {text}" for role, text in recent]
     
     async def clear_history(self):
         """Thread-safe method to clear conversation history."""
         async with self.history_lock:
-            self.conversation_history = []
+            self.conversation_history.clear()
             logger.info(f"Cleared history for session {self.session_id}")
 
 
@@ -53,7 +82,7 @@ class ChatbotService:
         self.model_name = model_name
         self.llm_service = None  # Will be initialized lazily
         self.mongo_service: MongoService = MongoService()
-        self.sessions: Dict[str, ChatSession] = {}
+        self.sessions: Dict[str, ChatSession] = cachetools.TTLCache(maxsize=MAX_SESSIONS, ttl=SESSION_TTL)
         self.sessions_lock = asyncio.Lock()  # Lock for thread-safe session management
         logger.info(f"Initialized Chatbot service with model: {model_name}")
 
@@ -65,27 +94,35 @@ class ChatbotService:
 
     async def get_or_create_session(self, session_id: str = None) -> str:
         """Get an existing session or create a new one."""
+        session = await self._get_or_create_session(session_id)
+        return session.session_id
+
+    async def _get_or_create_session(self, session_id: str = None) -> ChatSession:
+        """Get or create a session and refresh its expiry."""
         if not session_id:
             session_id = str(uuid.uuid4())
         
         async with self.sessions_lock:
-            if session_id not in self.sessions:
-                self.sessions[session_id] = ChatSession(session_id)
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = ChatSession(session_id)
                 logger.info(f"Created new session: {session_id}")
+            # Re-inserting restarts the TTL, so only idle sessions expire
+            self.sessions[session_id] = session
         
-        return session_id
+        return session
 
     async def automation_flow_stream(self, query: str, session_id: str = None) -> AsyncGenerator[str, None]:
         """Get the financial report from the tools - optimized for concurrency."""
         # Ensure we have a valid session
-        session_id = await self.get_or_create_session(session_id)
-        session = self.sessions[session_id]
+        session = await self._get_or_create_session(session_id)
         
         llm_service = await self._get_llm_service()
         tools = [search_engine.search_information, get_stock_information_tools.get_stock_information_by_year]
 
-        # Get a copy of the conversation history
-        current_history = await session.get_history()
+        # Only the most recent turns go into the prompt, so its size stays
+        # bounded however long the session runs
+        current_history = await session.get_recent_history()
         
         prompt_with_context = prompt.build_prompt_with_tools_for_automation(query, current_history)
         
@@ -105,7 +142,7 @@ class ChatbotService:
             async for chunk in response_stream:
                 if chunk is not None:
                     full_response += chunk
-                    yield f"data: {json.dumps({'text': chunk})}\n\n"
+                    yield f"data: {_sse_encoder.encode({'text': chunk})}\n\n"
             
             # Update conversation history after streaming is complete
             await session.add_to_history(query, full_response)
@@ -116,8 +153,9 @@ class ChatbotService:
     async def clear_session(self, session_id: str) -> bool:
         """Clear the conversation history for a specific session."""
         async with self.sessions_lock:
-            if session_id in self.sessions:
-                await self.sessions[session_id].clear_history()
+            session = self.sessions.get(session_id)
+            if session is not None:
+                await session.clear_history()
                 return True
             return False
 
@@ -130,6 +168,10 @@ async def get_chatbot_service_async(model_name: str = llm_config.default_model)
     """Get the singleton chatbot service instance with proper async locking."""
     global _chatbot_service
     
+    # Fast path: once created, no request needs to touch the lock
+    if _chatbot_service is not None:
+        return _chatbot_service
+    
     async with _service_lock:
         if _chatbot_service is None:
             _chatbot_service = ChatbotService(model_name)
@@ -4,7 +4,9 @@ LLM Service for interacting with Google's Gemini AI with optimized concurrency s
 from __future__ import annotations
 
 import asyncio
-from typing import Optional, List, Callable, AsyncGenerator
+import io
+import threading
+from typing import Optional, List, Callable, AsyncGenerator, Dict, Tuple
 
 from google import genai
 from google.genai import types
@@ -14,6 +16,10 @@ from loguru import logger
 from src.core.config import llm_config
 from src.core.llm_key_manager import get_key_manager
 
+# Gemini caps a whole request at 20 MB, and inline file data is base64 encoded
+# (4/3 larger); keep 1 MB of headroom for the prompt and system instruction
+INLINE_DATA_LIMIT = (20 - 1) * 1024 * 1024 * 3 // 4
+
 
 class LLMService:
     """
@@ -59,9 +65,13 @@ class LLMService:
         # Lock for managing concurrent access to client and keys
         self.client_lock = asyncio.Lock()
         
+        # One client per API key, reused across requests so connections are
+        # kept alive instead of being re-established on every call
+        self._clients: Dict[str, genai.Client] = {}
+        
         # Initialize client with a random key
         initial_key = self.key_manager.get_random_key()
-        self.client = genai.Client(api_key=initial_key)
+        self.client = self._get_client(initial_key)
         self.current_key = initial_key
         
         # Semaphore for limiting concurrent API requests
@@ -71,18 +81,25 @@ class LLMService:
         if backup_models:
             logger.info(f"Backup models configured: {', '.join(backup_models)}")
 
-    async def _refresh_client(self) -> str:
+    def _get_client(self, key: str) -> genai.Client:
+        """Get the cached client for an API key, creating it on first use."""
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = genai.Client(api_key=key)
+        return client
+
+    async def _refresh_client(self) -> Tuple[str, genai.Client]:
         """
-        Get a fresh client with a different API key, with proper locking.
+        Pick a different API key and its client, with proper locking.
         
         Returns:
-            The API key being used
+            Tuple of (API key, client for that key)
         """
         async with self.client_lock:
             key = self.key_manager.get_random_key()
-            self.client = genai.Client(api_key=key)
+            self.client = self._get_client(key)
             self.current_key = key
-            return key
+            return key, self.client
         
     async def _handle_rate_limit(
         self, 
@@ -132,7 +149,80 @@ class LLMService:
         else:
             return self.backup_models[model_index - 1]
 
-    async def _process_function_call_chunk(self, chunk) -> Optional[str]:
+    async def agenerate_content(
+        self,
+        prompt: str,
+        file_path: Optional[str] = None,
+        system_instruction: Optional[str] = None,
+        content: Optional[bytes] = None,
+        mime_type: str = "application/pdf"
+    ) -> Optional[str]:
+        """
+        Generate content asynchronously, optionally grounded on a file.
+
+        Args:
+            prompt: The text prompt to send to the model
+            file_path: Optional path of a file (e.g. a PDF) to upload and send with the prompt
+            system_instruction: Optional system instruction for the model
+            content: Optional file bytes, sent inline when they fit in the request
+                and otherwise uploaded from memory
+            mime_type: MIME type of `content`
+
+        Returns:
+            Generated text, or None if generation failed
+        """
+        retry_count = 0
+        model_index = 0
+        config = types.GenerateContentConfig(system_instruction=system_instruction)
+        uploaded: Dict[str, types.File] = {}  # file uploaded per API key during this call
+
+        while True:
+            current_key = self.key_manager.get_random_key()
+            client = self._get_client(current_key)
+            model_name = self._get_model_name(model_index)
+            try:
+                # Share the service-wide request cap with the chat streams, so
+                # concurrent extractions can't crowd out interactive requests
+                async with self.api_semaphore:
+                    contents = [prompt]
+                    if content is not None and len(content) <= INLINE_DATA_LIMIT:
+                        contents.insert(0, types.Part.from_bytes(data=content, mime_type=mime_type))
+                    elif content is not None or file_path:
+                        # Uploaded files belong to the key's project, so an upload is reused
+                        # on retries with the same key instead of sending the bytes again
+                        uploaded_file = uploaded.get(current_key)
+                        if uploaded_file is None:
+                            if content is not None:
+                                uploaded_file = await client.aio.files.upload(
+                                    file=io.BytesIO(content), config=types.UploadFileConfig(mime_type=mime_type)
+                                )
+                            else:
+                                uploaded_file = await client.aio.files.upload(file=file_path)
+                            uploaded[current_key] = uploaded_file
+                        contents.insert(0, uploaded_file)
+
+                    response = await client.aio.models.generate_content(
+                        model=model_name,
+                        config=config,
+                        contents=contents,
+                    )
+                return response.text
+
+            except self.RATE_LIMIT_ERRORS as e:
+                logger.warning(f"Rate limit error encountered: {e}")
+                try:
+                    retry_count, model_index = await self._handle_rate_limit(
+                        current_key, retry_count, e, model_index
+                    )
+                except self.RATE_LIMIT_ERRORS:
+                    return None
+
+            except Exception as e:
+                logger.error(f"Error generating content: {str(e)}")
+                return None
+
+    @staticmethod
+    def _process_function_call_chunk(chunk) -> Optional[str]:
         """
         Process a chunk that might contain a function call.
         
@@ -171,24 +261,27 @@ class LLMService:
         model_index = 0
         response_stream = None
         operation_tools = operation_tools or []
+        # Index tools by name once so each function call is an O(1) lookup
+        tool_map = {tool.__name__: tool for tool in operation_tools}
         empty_chunk_count = 0
         max_empty_chunks = 30 
 
         # Get the stream with a semaphore - this is the only part that needs rate limiting
         while response_stream is None:
             try:
-                logger.info(f"Attempting to get response stream (retry_count={retry_count}, model_index={model_index})")
+                logger.debug("Attempting to get response stream (retry_count={}, model_index={})", retry_count, model_index)
                 
                 # Only use the semaphore for the API call, not for the entire streaming process
                 async with self.api_semaphore:
-                    logger.info("Acquired API semaphore")
+                    logger.debug("Acquired API semaphore")
                     
-                    # Get a fresh client with a new API key for each attempt
-                    current_key = await self._refresh_client()
+                    # Rotate to another API key for each attempt; the client is
+                    # kept local so concurrent requests don't swap it underneath us
+                    current_key, client = await self._refresh_client()
                     
                     # Use the appropriate model based on retries
                     model_name = self._get_model_name(model_index)
-                    logger.info(f"Using model: {model_name}")
+                    logger.debug("Using model: {}", model_name)
                     
                     # Prepare initial content
                     contents = [types.Content(role="user", parts=[types.Part(text=prompt)])]
@@ -209,14 +302,7 @@ class LLMService:
                         }
                     }
                     
-                    # Get initial streaming response
-                    response_stream = self.client.models.generate_content_stream(
-                        model=model_name,
-                        config=config_tools,
-                        contents=contents
-                    )
-                    
-                    # Process the initial response to handle any function calls
+                    # Resolve any function calls before streaming the final answer
                     processed_contents = contents.copy()
                     has_function_calls = True
                     
@@ -225,7 +311,7 @@ class LLMService:
                         has_function_calls = False
                         
                         # Make a non-streaming call to get function/tool calls
-                        response = self.client.models.generate_content(
+                        response = await client.aio.models.generate_content(
                             model=model_name,
                             config=config_tools,
                             contents=processed_contents,
@@ -235,11 +321,12 @@ class LLMService:
                         if response.candidates and response.candidates[0].content.parts:
                             for part in response.candidates[0].content.parts:
                                 if hasattr(part, 'function_call') and part.function_call:
-                                    await self._process_tool_call(part.function_call, operation_tools, processed_contents)
+                                    await self._process_tool_call(part.function_call, tool_map, processed_contents)
                                     has_function_calls = True  # Continue the loop if we found function calls
                     
                     # Get final streaming response with all function calls processed
-                    response_stream = self.client.models.generate_content_stream(
+                    # (native async API, so neither call blocks the event loop)
+                    response_stream = await client.aio.models.generate_content_stream(
                         model=model_name,
                         config=config_tools,
                         contents=processed_contents
@@ -265,13 +352,20 @@ class LLMService:
         try:
             logger.info("Processing response stream")
             has_yielded_content = False
+            streamed_chunks = 0
+            streamed_chars = 0
+            # Bound once outside the per-chunk loop
+            process_chunk = self._process_function_call_chunk
             
-            for chunk in response_stream:
+            async for chunk in response_stream:
                 # Handle chunks with function calls or None text
-                chunk_text = await self._process_function_call_chunk(chunk)
+                chunk_text = process_chunk(chunk)
                 
                 if chunk_text is not None:
-                    logger.debug(f"Received text chunk: {chunk_text}")
+                    # Lazy arguments: nothing is formatted unless DEBUG is enabled
+                    logger.debug("Received text chunk: {}", chunk_text)
+                    streamed_chunks += 1
+                    streamed_chars += len(chunk_text)
                     yield chunk_text
                     has_yielded_content = True
                     empty_chunk_count = 0  # Reset empty chunk counter
@@ -284,8 +378,8 @@ class LLMService:
                         logger.warning(f"Received {empty_chunk_count} empty chunks. Retrying with a new stream.")
                         # Break out of the loop to retry with a new stream
                         break
-                
-                await asyncio.sleep(0)  # Yield control back to event loop
+            
+            logger.info(f"Streamed {streamed_chunks} chunks ({streamed_chars} chars)")
             
             # If we broke out of the loop due to empty chunks and haven't yielded content, retry
             if empty_chunk_count >= max_empty_chunks and not has_yielded_content:
@@ -317,20 +411,21 @@ class LLMService:
             logger.error(f"Error processing content stream with tools: {str(e)}")
             yield None
 
-    async def _process_tool_call(self, tool_call, operation_tools, contents):
+    async def _process_tool_call(self, tool_call, tool_map, contents):
         """Process a tool call and update contents with results."""
-        logger.info(f"Tool call: {tool_call}")
+        logger.info(f"Tool call: {tool_call.name}")
+        logger.debug("Tool {} args: {}", tool_call.name, tool_call.args)
         
         # Find the corresponding tool
-        tool = next((t for t in operation_tools if t.__name__ == tool_call.name), None)
-        if not tool:
+        tool = tool_map.get(tool_call.name)
+        if tool is None:
             logger.warning(f"Tool {tool_call.name} not found in available tools.")
             return
         
         try:
             # Execute the tool
             result = await tool(**tool_call.args)
-            logger.info(f"Tool {tool_call.name} results: {result}")
+            logger.debug("Tool {} results: {}", tool_call.name, result)
             
             # Create function response part
             function_response_part = types.Part.from_function_response(
@@ -345,9 +440,43 @@ class LLMService:
             logger.error(f"Error executing tool {tool_call.name}: {e}")
 
 
-# Global service instance and lock
+# Service instances keyed by configuration, and the locks guarding them
 _service_lock = asyncio.Lock()
-default_llm_service = None
+_sync_service_lock = threading.Lock()
+_llm_services: Dict[Tuple[str, Tuple[str, ...], str], LLMService] = {}
+
+
+def get_llm_service(
+    model_name: str = llm_config.default_model,
+    backup_models: Optional[List[str]] = None,
+    api_key_prefix: str = "GEMINI_API_KEY"
+) -> LLMService:
+    """
+    Get an LLM service instance from synchronous code such as worker threads.
+    
+    Args:
+        model_name: Name of the model to use
+        backup_models: List of backup models to use if primary model fails
+        api_key_prefix: Prefix for environment variables containing API keys
+        
+    Returns:
+        LLM service instance, shared with get_llm_service_async
+    """
+    if backup_models is None:
+        backup_models = getattr(llm_config, 'backup_models', [])
+    
+    service_key = (model_name, tuple(backup_models), api_key_prefix)
+    
+    with _sync_service_lock:
+        service = _llm_services.get(service_key)
+        if service is None:
+            service = _llm_services[service_key] = LLMService(
+                model_name=model_name, 
+                backup_models=list(backup_models),
+                api_key_prefix=api_key_prefix
+            )
+    
+    return service
 
 
 async def get_llm_service_async(
@@ -368,24 +497,20 @@ async def get_llm_service_async(
     Returns:
         LLM service instance
     """
-    global default_llm_service
-    
     # Initialize default values if None
     if backup_models is None:
         backup_models = getattr(llm_config, 'backup_models', [])
     
+    service_key = (model_name, tuple(backup_models), api_key_prefix)
+    
     async with _service_lock:
+        service = _llm_services.get(service_key)
         # Create a new instance if needed
-        if (default_llm_service is None or 
-            force_new or 
-            model_name != default_llm_service.model_name or
-            backup_models != default_llm_service.backup_models or
-            api_key_prefix != default_llm_service.api_key_prefix):
-            
-            default_llm_service = LLMService(
+        if service is None or force_new:
+            service = _llm_services[service_key] = LLMService(
                 model_name=model_name, 
-                backup_models=backup_models,
+                backup_models=list(backup_models),
                 api_key_prefix=api_key_prefix
             )
     
-    return default_llm_service
\ No newline at end of file
+    return service
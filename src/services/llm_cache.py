@@ -0,0 +1,141 @@
+"""
+Filesystem cache for LLM responses, keyed by a hash of everything that shapes the response.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import cachetools
+from loguru import logger
+
+from src.core.config import settings
+
+
+MEMORY_CACHE_CHARS = 16 * 1024 * 1024  # total size of the recently used responses kept in memory
+
+
+class LLMResponseCache:
+    """
+    Content-addressed store of LLM responses, one text file per key, with the
+    most recently used entries also kept in memory.
+    Entries never expire: a key already covers the model, prompt and input bytes.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path] = settings.LLM_CACHE_DIR, memory_chars: int = MEMORY_CACHE_CHARS):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached responses
+            memory_chars: Total characters of responses kept in memory in front of the files
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Sized by text length, since a whole-document entry can be far larger
+        # than a page; called from worker threads, so guarded by a lock
+        self._memory = cachetools.LRUCache(maxsize=memory_chars, getsizeof=len)
+        self._memory_lock = threading.Lock()
+
+    def _remember(self, key: str, value: str) -> None:
+        """Keep a response in memory, unless it alone exceeds the memory budget."""
+        if len(value) <= self._memory.maxsize:
+            with self._memory_lock:
+                self._memory[key] = value
+
+    @staticmethod
+    def make_key(*parts: Union[str, bytes]) -> str:
+        """
+        Build a cache key from the request inputs.
+
+        Each part is length-prefixed before hashing so that different splits
+        of the same bytes (e.g. "ab"+"c" vs "a"+"bc") never collide.
+
+        Args:
+            parts: Model name, prompt version, input bytes, ...
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part.encode("utf-8") if isinstance(part, str) else part
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        """Get the file holding the response for a key."""
+        return self.cache_dir / f"{key}.md"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        with self._memory_lock:
+            value = self._memory.get(key)
+        if value is not None:
+            return value
+        try:
+            value = self._path(key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read LLM cache entry {key}: {e}")
+            return None
+        self._remember(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response.
+
+        Written to a temporary file and renamed into place, so concurrent
+        readers never see a partially written entry.
+
+        Args:
+            key: Cache key from make_key
+            value: Response text to store
+        """
+        self._remember(key, value)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not write LLM cache entry {key}: {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def clear(self) -> int:
+        """
+        Remove every cached response, in memory and on disk.
+
+        Returns:
+            Number of files removed
+        """
+        with self._memory_lock:
+            self._memory.clear()
+        removed = 0
+        for path in self.cache_dir.glob("*.md"):
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove LLM cache entry {path.name}: {e}")
+        logger.info(f"Cleared {removed} LLM cache entries")
+        return removed
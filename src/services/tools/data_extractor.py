@@ -4,23 +4,91 @@ Handles splitting PDFs into pages, extracting text, and saving results.
 """
 from __future__ import annotations
 
+import asyncio
+import functools
+import glob
+import hashlib
+import heapq
 import io
 import os
-import tempfile
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import BinaryIO, Callable, Iterator, List, Optional, Dict, Any, TextIO, Tuple, Union
 
 from loguru import logger
-from PyPDF2 import PdfReader, PdfWriter
+import pikepdf
 
-from services.gemini_client import get_llm_service
+from src.services.gemini_client import INLINE_DATA_LIMIT, LLMService, get_llm_service
+from src.services.llm_cache import LLMResponseCache
 from src.core.config import settings
 from src.core.config import llm_config
 # Constants
 MODEL_NAME = llm_config.default_model
 TIMESTAMP_FORMAT = "%Y%m%d"
 EXTRACTION_SUFFIX = "_extracted.md"
+PARTIAL_SUFFIX = ".part"  # in-progress output, renamed to the versioned name when complete
+MAX_CONCURRENCY = 8  # requests sent to the model at the same time
+BATCH_PAGES = llm_config.extraction_batch_pages  # pages per request when a long PDF is split
+EXTRACTION_PROMPT_VERSION = "v1"  # bump when response post-processing changes to invalidate cached pages
+WHOLE_FILE_MAX_PAGES = llm_config.extraction_whole_file_max_pages  # PDFs up to this many pages are sent in a single request
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_WINDOW = 1024  # PDF readers accept the header anywhere in the first 1 KB
+HASH_CHUNK_SIZE = 1024 * 1024  # bytes read at a time when hashing a PDF for its cache key
+_CODE_FENCE = re.compile(r"```(?:markdown)?")  # fences the model wraps its markdown in
+_PAGE_BLOCK = re.compile(r"<PAGE idx=['\"]?(\d+)['\"]?>(.*?)</PAGE>", re.DOTALL)  # per-page output of a batch
+
+# Extraction prompts, built once; their fingerprint is part of every cache key
+EXTRACTION_SYSTEM_INSTRUCTION = """
+# PDF Content Extraction Instructions
+
+Extract and convert the complete content of this PDF document following these specifications:
+
+## Content Requirements
+- Carefully extract all text content including headers, paragraphs, footnotes, and captions
+- Convert all tables to markdown format using | for columns and - for header separation
+- Provide brief descriptions for non-text elements (images, charts, graphs) in [brackets]
+- Extract the original document hierarchy and section organization
+
+## Formatting Rules
+- Use ATX-style headers with a single space after # (e.g., # Heading 1)
+- Add blank lines before and after headers, lists, and code blocks
+- Use consistent emphasis markers: *italic* and **bold**
+- Preserve all numerical values and data relationships exactly as shown
+- Follow standard markdown table formatting:
+  | Column 1 | Column 2 |
+  |----------|----------|
+  | Data     | Data     |
+
+## Important Notes
+- Convert the content exactly as presented without additional commentary
+- Maintain the original document structure and flow
+- Do not add explanatory text or processing notes
+"""
+EXTRACTION_PROMPT = "Extract and convert the complete content of this PDF document to markdown format."
+BATCH_EXTRACTION_PROMPT = (
+    "Extract and convert the complete content of this PDF document to markdown format. "
+    "It holds pages {first_page} to {last_page} of a longer report: wrap the markdown of each page "
+    "in <PAGE idx='N'>...</PAGE> tags, where N is the page number starting from {first_page}."
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _prompt_fingerprint(*prompts: str) -> str:
+    """Hash the prompts that shape an extraction once, for use in cache keys"""
+    return LLMResponseCache.make_key(EXTRACTION_PROMPT_VERSION, *prompts)
+
+
+@functools.lru_cache(maxsize=128)
+def _version_pattern(stem: str) -> re.Pattern:
+    """Compile the pattern matching versioned outputs of a base name, e.g. STEM_v3.md"""
+    return re.compile(rf"^{re.escape(stem)}_v(\d+)\.(?:md|txt)$")
+
+
+def _append_and_flush(output: TextIO, text: str) -> None:
+    """Append text to an open file and flush it to disk (blocking, run in a thread)"""
+    output.write(text)
+    output.flush()
 
 
 class DataExtractor:
@@ -29,38 +97,84 @@ class DataExtractor:
     Handles PDF splitting, text extraction, and result management.
     """
     
-    def __init__(self, model_name: str = MODEL_NAME):
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        max_concurrency: int = MAX_CONCURRENCY,
+        batch_pages: int = BATCH_PAGES
+    ):
         """
         Initialize the DataExtractor.
         
         Args:
             model_name: Name of the LLM model to use for extraction
+            max_concurrency: Maximum number of page batches extracted in parallel
+            batch_pages: Number of pages sent to the model per request
         """
         self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.batch_pages = max(1, batch_pages)
+        self.response_cache = LLMResponseCache()
+        self._llm_service: Optional[LLMService] = None
+        # Model requests in flight by cache key, so identical pages share one call
+        self._pending_requests: Dict[str, asyncio.Future] = {}
+        # Callers awaiting each in-flight request; the last one to leave cancels it
+        self._pending_waiters: Dict[asyncio.Future, int] = {}
         self.timestamp_format = TIMESTAMP_FORMAT
         self.extraction_suffix = EXTRACTION_SUFFIX
     
-    def split_pdf_to_pages(self, file_path: str) -> List[bytes]:
+    @property
+    def llm_service(self) -> LLMService:
+        """LLM service used for extraction, created on first use and reused across pages and PDFs"""
+        if self._llm_service is None:
+            self._llm_service = get_llm_service(self.model_name)
+        return self._llm_service
+    
+    def is_pdf_file(self, file_path: str) -> bool:
         """
-        Split PDF into individual pages.
+        Check the file header for the PDF signature without reading the whole file.
         
         Args:
-            file_path: Path to the PDF file
+            file_path: Path to the file
             
         Returns:
-            List of binary page data
+            True if the file starts like a PDF document
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(PDF_HEADER_WINDOW)
+        return PDF_MAGIC in head
+    
+    def split_pdf_to_pages(self, file_path: Union[str, BinaryIO], pages_per_chunk: int = 1) -> Iterator[bytes]:
         """
-        reader = PdfReader(file_path)
-        pages = []
+        Split PDF into individual pages, or into chunks of consecutive pages.
         
-        for page in reader.pages:
-            writer = PdfWriter()
-            writer.add_page(page)
-            with io.BytesIO() as output_stream:
-                writer.write(output_stream)
-                pages.append(output_stream.getvalue())
+        Chunks are produced lazily, so only the ones currently being
+        processed are held in memory rather than the whole split document.
         
-        return pages
+        Args:
+            file_path: Path to the PDF file, or a binary stream holding one
+            pages_per_chunk: Number of pages in each output PDF
+            
+        Yields:
+            Binary PDF data, one entry per chunk
+        """
+        # pikepdf (QPDF) copies just the objects each page references, instead
+        # of re-walking the whole document for every single-page writer
+        with pikepdf.open(file_path) as source:
+            total_pages = len(source.pages)
+            for start in range(0, total_pages, pages_per_chunk):
+                page_pdf = pikepdf.Pdf.new()
+                page_pdf.pages.extend(source.pages[start:start + pages_per_chunk])
+                # Pages often inherit the document-wide resource dictionary; drop the
+                # fonts and images these pages never draw so each request stays small
+                page_pdf.remove_unreferenced_resources()
+                with io.BytesIO() as output_stream:
+                    page_pdf.save(
+                        output_stream,
+                        compress_streams=True,
+                        object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    )
+                    yield output_stream.getvalue()
     
     def merge_extracted_texts(self, texts: List[str]) -> str:
         """
@@ -85,29 +199,85 @@ class DataExtractor:
             Next version number to use
         """
         dir_path = os.path.dirname(base_path)
-        base_name = os.path.basename(base_path).replace('.md', '')
-        base_name = os.path.basename(base_path).replace('.txt', '')
+        pattern = _version_pattern(Path(base_path).stem)
         
-        # Get all files in directory
+        # Scan the directory entries and keep only the highest matching version
+        latest = 0
         try:
-            files = os.listdir(dir_path)
+            with os.scandir(dir_path or ".") as entries:
+                for entry in entries:
+                    match = pattern.match(entry.name)
+                    if match:
+                        latest = max(latest, int(match.group(1)))
         except FileNotFoundError:
             # Directory doesn't exist, start with version 1
             return 1
         
-        # Filter files that match base name pattern and extract version numbers
-        versions = []
-        for file in files:
-            if file.startswith(base_name) and '_v' in file:
-                try:
-                    version_str = file.split('_v')[-1].split('.')[0]
-                    version = int(version_str)
-                    versions.append(version)
-                except (ValueError, IndexError):
-                    continue
-        
         # Return next version number
-        return max(versions) + 1 if versions else 1
+        return latest + 1
+    
+    def reserve_output_file(self, base_path: str) -> str:
+        """
+        Claim the next free versioned output path for a base name.
+        
+        The file is created exclusively, so concurrent extractions of the same
+        PDF on the same day each get their own version instead of both
+        computing the same next version and overwriting one another.
+        
+        Args:
+            base_path: Base path for the output file, e.g. REPORT_20250101_extracted.md
+            
+        Returns:
+            Path of the newly created (empty) versioned file
+        """
+        base = Path(base_path)
+        version = self.get_next_version(base_path)
+        while True:
+            output_file = base.with_name(f"{base.stem}_v{version}{base.suffix}")
+            try:
+                with open(output_file, 'x', encoding='utf-8'):
+                    return str(output_file)
+            except FileExistsError:
+                version += 1
+    
+    def find_latest_extraction(self, file_path: str, output_dir: Optional[str] = None) -> Optional[Path]:
+        """
+        Find the newest extraction written for a PDF by earlier runs.
+        
+        Only finished extractions count: text is published to a versioned file
+        by an atomic rename once every page was extracted, so an empty file is
+        a version reserved by a run still in progress (or one that was killed).
+        
+        Args:
+            file_path: Path to the source PDF
+            output_dir: Directory holding extractions (defaults to settings.CONVERTED_FILE_DIR)
+            
+        Returns:
+            Path of the most recent non-empty STEM_<date>_extracted_v<n>.md, or None if there is none
+        """
+        stem = Path(file_path).stem
+        output_dir = Path(output_dir or settings.CONVERTED_FILE_DIR)
+        suffix_stem = Path(self.extraction_suffix).stem
+        # The glob narrows the scan; the pattern rejects other reports sharing the prefix
+        pattern = re.compile(rf"^{re.escape(stem)}_(\d+){re.escape(suffix_stem)}_v(\d+)\.md$")
+        
+        latest = None
+        latest_rank = None
+        for candidate in output_dir.glob(f"{glob.escape(stem)}_*{suffix_stem}_v*.md"):
+            match = pattern.match(candidate.name)
+            if not match:
+                continue
+            rank = (match.group(1), int(match.group(2)))
+            if latest_rank is not None and rank <= latest_rank:
+                continue
+            try:
+                if candidate.stat().st_size == 0:
+                    continue
+            except OSError:
+                # Removed by a run that failed while we were scanning
+                continue
+            latest, latest_rank = candidate, rank
+        return latest
     
     def get_extraction_system_instruction(self) -> str:
         """
@@ -116,32 +286,7 @@ class DataExtractor:
         Returns:
             Formatted system instruction string
         """
-        return """
-# PDF Content Extraction Instructions
-
-Extract and convert the complete content of this PDF document following these specifications:
-
-## Content Requirements
-- Carefully extract all text content including headers, paragraphs, footnotes, and captions
-- Convert all tables to markdown format using | for columns and - for header separation
-- Provide brief descriptions for non-text elements (images, charts, graphs) in [brackets]
-- Extract the original document hierarchy and section organization
-
-## Formatting Rules
-- Use ATX-style headers with a single space after # (e.g., # Heading 1)
-- Add blank lines before and after headers, lists, and code blocks
-- Use consistent emphasis markers: *italic* and **bold**
-- Preserve all numerical values and data relationships exactly as shown
-- Follow standard markdown table formatting:
-  | Column 1 | Column 2 |
-  |----------|----------|
-  | Data     | Data     |
-
-## Important Notes
-- Convert the content exactly as presented without additional commentary
-- Maintain the original document structure and flow
-- Do not add explanatory text or processing notes
-"""
+        return EXTRACTION_SYSTEM_INSTRUCTION
     
     def get_extraction_prompt(self) -> str:
         """
@@ -150,96 +295,495 @@ Extract and convert the complete content of this PDF document following these sp
         Returns:
             Formatted user prompt string
         """
-        return "Extract and convert the complete content of this PDF document to markdown format."
+        return EXTRACTION_PROMPT
     
-    def extract_text_from_pdf(self, file_path: str) -> Dict[str, Any]:
+    def count_pages(self, file_path: str) -> int:
+        """
+        Count the pages of a PDF without splitting it.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            Number of pages
+        """
+        with pikepdf.open(file_path) as source:
+            return len(source.pages)
+    
+    def _document_key(self, file_path: str) -> str:
+        """
+        Hash a PDF for the whole-document cache key (blocking, run in a thread).
+        
+        The file is streamed through the hash, never held in memory.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            Cache key covering the contents and every setting that shapes the output
+        """
+        # Stream the file through the hash in chunks (hashlib.file_digest needs Python 3.11)
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(functools.partial(f.read, HASH_CHUNK_SIZE), b""):
+                hasher.update(block)
+        return LLMResponseCache.make_key(
+            "document",
+            self.model_name,
+            _prompt_fingerprint(
+                self.get_extraction_system_instruction(), self.get_extraction_prompt(), BATCH_EXTRACTION_PROMPT
+            ),
+            str(self.batch_pages),
+            hasher.digest(),
+        )
+    
+    async def _extract_pdf(
+        self,
+        llm_service: LLMService,
+        data: bytes,
+        label: str,
+        force_refresh: bool = False,
+        prompt: Optional[str] = None,
+        is_complete: Optional[Callable[[str], bool]] = None
+    ) -> Optional[str]:
+        """
+        Send PDF bytes to the model and clean the returned markdown.
+        
+        Responses are cached by the SHA-256 of the PDF bytes, model and prompt
+        text, so re-extracting a document (or resuming a failed run) only
+        calls the model for content it has not seen.
+        
+        Args:
+            llm_service: LLM service used for extraction
+            data: Bytes of the PDF (whole document or a single page)
+            label: Description used in log messages
+            force_refresh: Ignore any cached response and call the model
+            prompt: Prompt to send instead of the default extraction prompt
+            is_complete: Check a cleaned response must pass before it is cached
+            
+        Returns:
+            Cleaned markdown, or None if nothing was extracted
+        """
+        prompt = prompt or self.get_extraction_prompt()
+        cache_key = LLMResponseCache.make_key(
+            self.model_name,
+            _prompt_fingerprint(self.get_extraction_system_instruction(), prompt),
+            data,
+        )
+        if not force_refresh:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Using cached extraction for {label}")
+                return cached
+        
+        # Repeated pages (blank pages, disclaimers, dividers) that are already
+        # being extracted wait for that request instead of sending their own
+        pending = self._pending_requests.get(cache_key)
+        if pending is not None:
+            logger.info(f"Reusing in-flight extraction for {label}")
+        else:
+            pending = asyncio.ensure_future(
+                self._request_extraction(llm_service, data, label, prompt, cache_key, is_complete)
+            )
+            self._pending_requests[cache_key] = pending
+            pending.add_done_callback(functools.partial(self._forget_request, cache_key))
+        
+        # Shielded so one cancelled caller doesn't cancel the request for the
+        # others; once every caller has gone, the request itself is cancelled
+        # instead of running (and being billed) for nobody
+        self._pending_waiters[pending] = self._pending_waiters.get(pending, 0) + 1
+        try:
+            return await asyncio.shield(pending)
+        finally:
+            waiters = self._pending_waiters.pop(pending) - 1
+            if waiters:
+                self._pending_waiters[pending] = waiters
+            elif not pending.done():
+                # Forget it now so a new caller starts a fresh request rather
+                # than joining one that is being cancelled
+                self._forget_request(cache_key, pending)
+                pending.cancel()
+    
+    def _forget_request(self, cache_key: str, request: asyncio.Future) -> None:
+        """Drop a finished or abandoned request from the in-flight map, unless a newer one replaced it."""
+        if self._pending_requests.get(cache_key) is request:
+            del self._pending_requests[cache_key]
+    
+    async def _request_extraction(
+        self,
+        llm_service: LLMService,
+        data: bytes,
+        label: str,
+        prompt: str,
+        cache_key: str,
+        is_complete: Optional[Callable[[str], bool]] = None
+    ) -> Optional[str]:
+        """
+        Call the model for PDF bytes missing from the cache and store the cleaned result.
+        
+        Args:
+            llm_service: LLM service used for extraction
+            data: Bytes of the PDF
+            label: Description used in log messages
+            prompt: Prompt sent with the PDF
+            cache_key: Key the cleaned response is cached under
+            is_complete: Check a cleaned response must pass before it is cached
+            
+        Returns:
+            Cleaned markdown, or None if nothing was extracted
+        """
+        # Small PDFs go inline with the request; larger ones are uploaded
+        # straight from memory by the LLM service, never through a temp file
+        response = await llm_service.agenerate_content(
+            prompt=prompt,
+            content=data,
+            mime_type="application/pdf",
+            system_instruction=self.get_extraction_system_instruction()
+        )
+        
+        if not response:
+            logger.warning(f"No text extracted from {label}")
+            return None
+        
+        # Clean response by removing markdown code block markers in a single pass
+        cleaned_response = _CODE_FENCE.sub("", response)
+        
+        # Don't cache a truncated response, or every later run would reuse it
+        if is_complete is None or is_complete(cleaned_response):
+            await asyncio.to_thread(self.response_cache.set, cache_key, cleaned_response)
+        return cleaned_response
+    
+    async def _process_chunk(
+        self,
+        llm_service: LLMService,
+        first_page: int,
+        last_page: int,
+        chunk_data: bytes,
+        force_refresh: bool = False
+    ) -> Tuple[Optional[str], int]:
+        """
+        Extract the text of a chunk of consecutive pages.
+        
+        Multi-page chunks ask the model to tag each page, so pages missing from
+        a truncated response can be detected and extracted on their own.
+        
+        Args:
+            llm_service: LLM service used for extraction
+            first_page: 1-based number of the chunk's first page
+            last_page: 1-based number of the chunk's last page
+            chunk_data: Binary PDF data of the chunk
+            force_refresh: Ignore any cached response and call the model
+            
+        Returns:
+            Tuple of (cleaned markdown for the chunk or None if nothing was
+            extracted, number of pages that produced text)
+        """
+        if first_page == last_page:
+            logger.debug("Processing page {}", first_page)
+            text = await self._extract_pdf(llm_service, chunk_data, f"page {first_page}", force_refresh)
+            return text, 1 if text else 0
+        
+        label = f"pages {first_page}-{last_page}"
+        logger.debug("Processing {}", label)
+        page_numbers = range(first_page, last_page + 1)
+        
+        def split_pages(text: str) -> Dict[int, str]:
+            pages = {}
+            for idx, page_text in _PAGE_BLOCK.findall(text):
+                if int(idx) in page_numbers and page_text.strip():
+                    pages[int(idx)] = page_text.strip()
+            return pages
+        
+        response = await self._extract_pdf(
+            llm_service, chunk_data, label, force_refresh,
+            prompt=BATCH_EXTRACTION_PROMPT.format(first_page=first_page, last_page=last_page),
+            is_complete=lambda text: len(split_pages(text)) == len(page_numbers),
+        )
+        pages = split_pages(response or "")
+        
+        missing = [number for number in page_numbers if number not in pages]
+        if missing:
+            logger.warning(f"No output for page(s) {missing} in {label}, extracting them one by one")
+            single_pages = await asyncio.to_thread(lambda: list(self.split_pdf_to_pages(io.BytesIO(chunk_data))))
+            texts = await asyncio.gather(*(
+                self._extract_pdf(llm_service, single_pages[number - first_page], f"page {number}", force_refresh)
+                for number in missing
+            ))
+            for number, text in zip(missing, texts):
+                if text:
+                    pages[number] = text
+        
+        if not pages:
+            return None, 0
+        # Pages still empty after the retry are reported through the count, so a
+        # batch with gaps is never taken for a complete one
+        merged = self.merge_extracted_texts([pages[number] for number in page_numbers if number in pages])
+        return merged, len(pages)
+    
+    async def _extract_pages(
+        self,
+        llm_service: LLMService,
+        file_path: str,
+        total_pages: int,
+        output_file: str,
+        force_refresh: bool = False
+    ) -> int:
+        """
+        Split a PDF into batches of `batch_pages` pages and extract them concurrently.
+        
+        Batching amortizes the per-request overhead (round trip and the
+        extraction prompt's tokens) over several pages.
+        
+        Args:
+            llm_service: LLM service used for extraction
+            file_path: Path to the PDF file
+            total_pages: Number of pages in the PDF
+            output_file: File that receives the merged text as batches complete
+            force_refresh: Ignore cached responses and call the model
+            
+        Returns:
+            Number of pages that produced text; the text itself is only kept in output_file
+        """
+        batch_pages = self.batch_pages
+        total_chunks = -(-total_pages // batch_pages)  # ceiling division
+        
+        pages_processed = 0
+        ready: List[tuple] = []  # min-heap of (chunk_index, text) finished but not yet written
+        next_chunk = 0  # first chunk not yet written to the output file
+        separator = ""  # merge_extracted_texts joins pages with newlines
+        completed = 0
+        
+        # Bounded pipeline: up to max_concurrency requests are awaited at once,
+        # the next chunk is split off while they run, and finished chunks are
+        # appended in order as soon as every earlier one is done
+        chunk_iter = enumerate(self.split_pdf_to_pages(file_path, batch_pages))
+        in_flight = {}
+        exhausted = False
+        prefetch = None  # split of the next chunk, running in a thread
+        
+        with open(output_file, 'w', encoding='utf-8') as output:
+            try:
+                while True:
+                    # Producer: splitting is CPU work in pikepdf, so pull chunks in a thread
+                    while not exhausted and len(in_flight) < self.max_concurrency:
+                        if prefetch is None:
+                            prefetch = asyncio.ensure_future(asyncio.to_thread(next, chunk_iter, None))
+                        item = await prefetch
+                        prefetch = None
+                        if item is None:
+                            exhausted = True
+                            break
+                        index, chunk_data = item
+                        first_page = index * batch_pages + 1
+                        last_page = min(first_page + batch_pages - 1, total_pages)
+                        task = asyncio.create_task(
+                            self._process_chunk(llm_service, first_page, last_page, chunk_data, force_refresh)
+                        )
+                        in_flight[task] = index
+                    
+                    if not in_flight:
+                        break
+                    
+                    # Split the next chunk while the model works on the ones in flight
+                    if not exhausted and prefetch is None:
+                        prefetch = asyncio.ensure_future(asyncio.to_thread(next, chunk_iter, None))
+                    
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        index = in_flight.pop(task)
+                        completed += 1
+                        text = None
+                        try:
+                            text, extracted = task.result()
+                            pages_processed += extracted
+                        except Exception as e:
+                            logger.error(f"Error processing page batch {index + 1}: {str(e)}")
+                        heapq.heappush(ready, (index, text or ""))
+                        
+                        # Log progress percentage
+                        progress = (completed / total_chunks) * 100
+                        logger.info(f"Progress: {progress:.1f}% ({completed}/{total_chunks} batches processed)")
+                    
+                    # Writer: save progress by appending the newly contiguous run of
+                    # chunks, as one write off the event loop
+                    pending = []
+                    while ready and ready[0][0] == next_chunk:
+                        _, text = heapq.heappop(ready)
+                        if text:
+                            pending.append(separator)
+                            pending.append(text)
+                            separator = "\n"
+                        next_chunk += 1
+                    if pending:
+                        await asyncio.to_thread(_append_and_flush, output, "".join(pending))
+            finally:
+                # Don't leave requests running if the caller was cancelled or splitting failed
+                for task in in_flight:
+                    task.cancel()
+                if prefetch is not None:
+                    prefetch.cancel()
+        
+        return pages_processed
+    
+    def extract_text_from_pdf(self, file_path: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Extract text from PDF, blocking until done; for scripts and the CLI.
+        
+        Each call runs on its own event loop with its own LLM service, because
+        the shared service's client transport, lock and semaphore are tied to
+        the loop they were first used on. It must not be called from async
+        code: await aextract_text_from_pdf there instead.
+        
+        Args:
+            file_path: Path to the PDF file
+            force_refresh: Ignore cached page responses and call the model again
+            
+        Returns:
+            Dictionary containing extraction results and metadata
+            
+        Raises:
+            RuntimeError: If called while an event loop is running in this thread
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "extract_text_from_pdf cannot be called from a running event loop; "
+                "await aextract_text_from_pdf instead"
+            )
+        
+        async def run() -> Dict[str, Any]:
+            # Built inside the new loop so nothing it holds outlives this call
+            llm_service = LLMService(
+                model_name=self.model_name,
+                backup_models=list(getattr(llm_config, 'backup_models', []))
+            )
+            return await self.aextract_text_from_pdf(file_path, force_refresh, llm_service=llm_service)
+        
+        return asyncio.run(run())
+    
+    async def aextract_text_from_pdf(
+        self,
+        file_path: str,
+        force_refresh: bool = False,
+        llm_service: Optional[LLMService] = None
+    ) -> Dict[str, Any]:
         """
         Extract text from PDF using Google's Gemini AI.
         
+        Short PDFs are sent whole in a single request. Longer ones are split
+        into batches of `batch_pages` pages and up to `max_concurrency`
+        batches are sent to the model at once; results are merged back in
+        page order. A document extracted completely before is served from the
+        response cache.
+        
+        The versioned output file only receives text once every page was
+        extracted; a failed, partial or cancelled run leaves no file behind.
+        
         Args:
             file_path: Path to the PDF file
+            force_refresh: Ignore cached document and page responses and call the model again
+            llm_service: Service to extract with instead of the shared one
             
         Returns:
             Dictionary containing extraction results and metadata
         """
-        llm_service = get_llm_service(self.model_name)
-        extracted_texts = []
+        llm_service = llm_service or self.llm_service
         timestamp = datetime.now().strftime(self.timestamp_format)
         
         # Get just the filename from the path
         filename = os.path.basename(file_path)
         
-        # Create output file path with versioning in the specified directory
+        # Output file path in the specified directory, e.g. REPORT_20250101_extracted_v2.md
         output_dir = Path(settings.CONVERTED_FILE_DIR)
-        base_output_file = os.path.join(output_dir, filename.replace('.pdf', f'_{timestamp}{self.extraction_suffix}'))
-        version = self.get_next_version(base_output_file)
-        output_file = base_output_file.replace('.pdf', f'_v{version}.md')
+        base_output_file = output_dir / f"{Path(filename).stem}_{timestamp}{self.extraction_suffix}"
+        output_file = None
+        part_file = None
+        published = False
         
         try:
-            # Split PDF into individual pages
-            pages = self.split_pdf_to_pages(file_path)
-            total_pages = len(pages)
+            # Reject non-PDF uploads before splitting or calling the model
+            if not await asyncio.to_thread(self.is_pdf_file, file_path):
+                error_msg = f"File is not a PDF document: {file_path}"
+                logger.error(error_msg)
+                return {"success": False, "message": error_msg}
+            
+            total_pages = await asyncio.to_thread(self.count_pages, file_path)
             logger.info(f"Processing PDF with {total_pages} pages: {file_path}")
+            # The reserved version stays empty until the extraction is complete;
+            # text is written to a side file and renamed over it only on success
+            output_file = await asyncio.to_thread(self.reserve_output_file, str(base_output_file))
+            part_file = f"{output_file}{PARTIAL_SUFFIX}"
             
-            # Process each page separately
-            for page_num, page_data in enumerate(pages, 1):
-                try:
-                    logger.info(f"Processing page {page_num}/{total_pages}")
-                    
-                    # Create temporary file for the page
-                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=True) as temp_file:
-                        temp_file.write(page_data)
-                        temp_file.flush() # flush is used to ensure that the data is written to the file
-                        
-                        # Use LLM service to process the page
-                        response = llm_service.generate_content(
-                            prompt=self.get_extraction_prompt(),
-                            file_path=temp_file.name,
-                            system_instruction=self.get_extraction_system_instruction()
-                        )
-                        
-                        # Add extracted text
-                        if response:
-                            # Clean response by removing markdown code block markers
-                            cleaned_response = response
-                            if "```markdown" in cleaned_response:
-                                cleaned_response = cleaned_response.replace("```markdown", "")
-                            if "```" in cleaned_response:
-                                cleaned_response = cleaned_response.replace("```", "")
-                            extracted_texts.append(cleaned_response)
-                        else:
-                            logger.warning(f"No text extracted from page {page_num}")
-                        
-                        # Save progress after each page
-                        with open(output_file, 'w', encoding='utf-8') as f:
-                            f.write(self.merge_extracted_texts(extracted_texts))
-                        
-                        # Log progress percentage
-                        progress = (page_num / total_pages) * 100
-                        logger.info(f"Progress: {progress:.1f}% ({page_num}/{total_pages} pages processed)")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing page {page_num}: {str(e)}")
-                    continue
+            # Short documents are one request, cached under that request's own key;
+            # only split documents need a whole-document key to skip the batches
+            whole_file = total_pages <= WHOLE_FILE_MAX_PAGES and os.path.getsize(file_path) <= INLINE_DATA_LIMIT
+            cached = None
+            if not whole_file:
+                document_key = await asyncio.to_thread(self._document_key, file_path)
+                if not force_refresh:
+                    cached = await asyncio.to_thread(self.response_cache.get, document_key)
+            
+            if cached is not None:
+                logger.info(f"Using cached extraction for document {filename}")
+                result = cached
+                pages_processed = total_pages
+                await asyncio.to_thread(Path(part_file).write_text, result, encoding='utf-8')
+            elif whole_file:
+                # Short documents fit in one response: skip splitting and send the file as is
+                data = await asyncio.to_thread(Path(file_path).read_bytes)
+                text = await self._extract_pdf(llm_service, data, f"document {filename}", force_refresh)
+                result = text or ""
+                pages_processed = total_pages if text else 0
+                if text:
+                    await asyncio.to_thread(Path(part_file).write_text, text, encoding='utf-8')
+            else:
+                # Pages are streamed straight to the side file; read the merged
+                # text back once instead of holding every page in memory as well
+                pages_processed = await self._extract_pages(
+                    llm_service, file_path, total_pages, part_file, force_refresh
+                )
+                result = await asyncio.to_thread(Path(part_file).read_text, encoding='utf-8')
             
             # Return final merged text
-            result = self.merge_extracted_texts(extracted_texts)
             if not result:
                 logger.warning("No text was extracted from the PDF")
                 return {"success": False, "message": "No text was extracted from the PDF"}
             
+            # A partial extraction is neither published nor cached, so the next run
+            # retries it; pages that did succeed are served from the page cache
+            if pages_processed < total_pages:
+                error_msg = f"Only {pages_processed} of {total_pages} pages were extracted from {filename}"
+                logger.warning(error_msg)
+                return {"success": False, "message": error_msg}
+            
+            # Whole-file responses are already cached under their request key
+            if cached is None and not whole_file:
+                await asyncio.to_thread(self.response_cache.set, document_key, result)
+            await asyncio.to_thread(os.replace, part_file, output_file)
+            published = True
+            
             return {
                 "success": True,
                 "content": result,
                 "processed_file_path": output_file,
                 "total_pages": total_pages,
-                "pages_processed": len(extracted_texts)
+                "pages_processed": pages_processed
             }
             
         except Exception as e:
             error_msg = f"Error processing PDF file: {str(e)}"
             logger.error(error_msg)
             return {"success": False, "message": error_msg}
+        finally:
+            # Runs on failure, cancellation and interrupts alike: never leave a
+            # placeholder or half-written file that could pass for an extraction
+            if not published:
+                for path in (part_file, output_file):
+                    if path:
+                        Path(path).unlink(missing_ok=True)
 
 
 if __name__ == "__main__":
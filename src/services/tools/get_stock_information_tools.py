@@ -1,46 +1,81 @@
-import json
 import os
+import functools
+import tempfile
 import atexit
+import traceback
 from datetime import datetime, timedelta
+from typing import Optional
+import orjson
 import pandas as pd
 from loguru import logger
 import asyncio
+import cachetools
 
 from vnstock import Vnstock
 
 # Constants
 FINANCE_DATA_CACHE_FILE = "finance_data_cache.json"
 DEFAULT_PERIOD = "annual"
-finance_data_cache = {}
+STATEMENT_FRAME_TTL = 3600  # seconds to keep raw statement frames in memory
+FINANCE_DATA_CACHE_SIZE = 2048  # formatted results kept; least recently used are dropped
+# Formatted results keyed by symbol/statement/year, persisted to FINANCE_DATA_CACHE_FILE
+finance_data_cache = cachetools.LRUCache(maxsize=FINANCE_DATA_CACHE_SIZE)
+# Raw statement frames keyed by (symbol, statement_type)
+statement_frame_cache = cachetools.TTLCache(maxsize=256, ttl=STATEMENT_FRAME_TTL)
+
+# Ratio metrics grouped by category, built once and shared by every call
+RATIO_CATEGORIES = {
+    'Valuation': ('P/B', 'P/E', 'P/S', 'P/Cash Flow', 'EPS (VND)', 'BVPS (VND)', 'EV/EBITDA', 'Vốn hóa (Tỷ đồng)', 'Số CP lưu hành (Triệu CP)'),
+    'Profitability': ('Biên lợi nhuận gộp (%)', 'Biên lợi nhuận ròng (%)', 'ROE (%)', 'ROA (%)', 'ROIC (%)', 'Biên EBIT (%)', 'EBITDA (Tỷ đồng)', 'EBIT (Tỷ đồng)', 'Tỷ suất cổ tức (%)'),
+    'Liquidity': ('Chỉ số thanh toán hiện thời', 'Chỉ số thanh toán tiền mặt', 'Chỉ số thanh toán nhanh', 'Khả năng chi trả lãi vay', 'Đòn bẩy tài chính'),
+    'Efficiency': ('Vòng quay tài sản', 'Vòng quay TSCĐ', 'Số ngày thu tiền bình quân', 'Số ngày tồn kho bình quân', 'Số ngày thanh toán bình quân', 'Chu kỳ tiền', 'Vòng quay hàng tồn kho'),
+    'Capital Structure': ('(Vay NH+DH)/VCSH', 'Nợ/VCSH', 'TSCĐ / Vốn CSH', 'Vốn CSH/Vốn điều lệ'),
+}
+
+# Vnstock finance method for each statement type
+STATEMENT_METHODS = {
+    'balance_sheet': 'balance_sheet',
+    'income_statement': 'income_statement',
+    'cash_flow': 'cash_flow',
+    'ratio': 'ratio',
+}
 
 # Basic cache functions
 def load_cache():
     """Load the finance data cache from file"""
-    if not os.path.exists(FINANCE_DATA_CACHE_FILE):
+    try:
+        with open(FINANCE_DATA_CACHE_FILE, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
         logger.warning(f"Cache file {FINANCE_DATA_CACHE_FILE} not found. Creating new cache.")
         return {}
-        
-    try:
-        with open(FINANCE_DATA_CACHE_FILE, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         logger.warning("Cache file corrupted. Creating new cache.")
         return {}
+    except OSError as e:
+        logger.error(f"Cache load error: {e}. Creating new cache.")
+        return {}
 
-def save_cache():
-    """Save the finance data cache to file"""
+def _write_cache_file(data):
+    """Write the cache to a temp file and rename it over the old one, so the file is never half-written"""
+    cache_dir = os.path.dirname(os.path.abspath(FINANCE_DATA_CACHE_FILE))
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
     try:
-        with open(FINANCE_DATA_CACHE_FILE, "w") as f:
-            json.dump(finance_data_cache, f, indent=4)
-        logger.info(f"Cache saved")
-    except Exception as e:
-        logger.error(f"Cache save error: {e}")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(dict(data), option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, FINANCE_DATA_CACHE_FILE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def save_cache():
+    """Save the module's finance data cache to file"""
+    save_finance_data_cache(finance_data_cache)
 
 def save_finance_data_cache(finance_data_cache):
     """Save the finance data cache to file"""
     try:
-        with open(FINANCE_DATA_CACHE_FILE, "w") as f:
-            json.dump(finance_data_cache, f, indent=4)
+        _write_cache_file(finance_data_cache)
         logger.info(f"Cache saved")
     except Exception as e:
         logger.error(f"Cache save error: {e}")
@@ -142,14 +177,31 @@ async def get_company_overview(symbol):
         return overview_data
     except Exception as e:
         logger.error(f"{symbol} overview error: {e}")
-        import traceback
         logger.error(traceback.format_exc())
         return "Error retrieving company overview."
 
+@functools.lru_cache(maxsize=32)
+def ratio_metric_columns(columns):
+    """Resolve (category, metric, column) for each ratio metric present in the given columns"""
+    string_columns = [col for col in columns if isinstance(col, str)]
+    matches = []
+    for category, metrics in RATIO_CATEGORIES.items():
+        for metric in metrics:
+            # Try to find exact match
+            if metric in columns:
+                matches.append((category, metric, metric))
+                continue
+            # Try to find partial match (for multi-level columns that might have been flattened)
+            for col in string_columns:
+                if metric in col:
+                    matches.append((category, metric, col))
+                    break
+    return tuple(matches)
+
 def format_ratio_dataframe(df):
     """Format ratio DataFrame for better readability"""
-    # Create a copy to avoid modifying the original
-    formatted_df = df.copy()
+    # Only the labels are changed below, so a shallow copy protects the caller's frame
+    formatted_df = df.copy(deep=False)
     
     # Reset the multi-level column index to a single level
     if isinstance(formatted_df.columns, pd.MultiIndex):
@@ -165,54 +217,28 @@ def format_ratio_dataframe(df):
     elif 'yearReport' in formatted_df.columns:
         formatted_df.rename(columns={'yearReport': 'year'}, inplace=True)
     
-    # Organize columns by category
-    column_categories = {
-        'Valuation': ['P/B', 'P/E', 'P/S', 'P/Cash Flow', 'EPS (VND)', 'BVPS (VND)', 'EV/EBITDA', 'Vốn hóa (Tỷ đồng)', 'Số CP lưu hành (Triệu CP)'],
-        'Profitability': ['Biên lợi nhuận gộp (%)', 'Biên lợi nhuận ròng (%)', 'ROE (%)', 'ROA (%)', 'ROIC (%)', 'Biên EBIT (%)', 'EBITDA (Tỷ đồng)', 'EBIT (Tỷ đồng)', 'Tỷ suất cổ tức (%)'],
-        'Liquidity': ['Chỉ số thanh toán hiện thời', 'Chỉ số thanh toán tiền mặt', 'Chỉ số thanh toán nhanh', 'Khả năng chi trả lãi vay', 'Đòn bẩy tài chính'],
-        'Efficiency': ['Vòng quay tài sản', 'Vòng quay TSCĐ', 'Số ngày thu tiền bình quân', 'Số ngày tồn kho bình quân', 'Số ngày thanh toán bình quân', 'Chu kỳ tiền', 'Vòng quay hàng tồn kho'],
-        'Capital Structure': ['(Vay NH+DH)/VCSH', 'Nợ/VCSH', 'TSCĐ / Vốn CSH', 'Vốn CSH/Vốn điều lệ']
-    }
-    
-    # Construct a well-organized DataFrame
-    result_dict = {
-        'Category': [],
-        'Metric': [],
-        'Value': []
-    }
+    # Materialize the single ratio row once; every metric is read from it
+    first_row = formatted_df.iloc[0]
     
     # Start with metadata
     if 'ticker' in formatted_df.columns:
-        ticker = formatted_df.iloc[0]['ticker']
+        ticker = first_row['ticker']
     else:
         ticker = 'Unknown'
         
     if 'year' in formatted_df.columns:
-        year = formatted_df.iloc[0]['year']
+        year = first_row['year']
     else:
         year = 'Unknown'
     
-    # Find all columns present in the DataFrame
-    for category, metrics in column_categories.items():
-        for metric in metrics:
-            col_match = None
-            # Try to find exact match
-            if metric in formatted_df.columns:
-                col_match = metric
-            # Try to find partial match (for multi-level columns that might have been flattened)
-            else:
-                for col in formatted_df.columns:
-                    if isinstance(col, str) and metric in col:
-                        col_match = col
-                        break
-            
-            if col_match is not None and not pd.isna(formatted_df.iloc[0][col_match]):
-                result_dict['Category'].append(category)
-                result_dict['Metric'].append(metric)
-                result_dict['Value'].append(formatted_df.iloc[0][col_match])
-    
-    # Create a new DataFrame from our organized data
-    result_df = pd.DataFrame(result_dict)
+    # Pick every matched metric out of the row in one selection and drop the missing ones
+    matches = ratio_metric_columns(tuple(formatted_df.columns))
+    result_df = pd.DataFrame({
+        'Category': [category for category, _, _ in matches],
+        'Metric': [metric for _, metric, _ in matches],
+        'Value': first_row[[col for _, _, col in matches]].to_numpy(),
+    })
+    result_df = result_df[result_df['Value'].notna()]
     
     # Format the markdown
     header = f"# Financial Ratios for {ticker} ({year})\n\n"
@@ -225,6 +251,41 @@ def format_ratio_dataframe(df):
     
     return markdown
 
+def ratio_year_column(statement_df):
+    """Find the year column of a ratio frame, whose columns are (category, metric) tuples"""
+    # The year is usually in the '(Meta, Năm)' column
+    if '(Meta, Năm)' in statement_df.columns:
+        return '(Meta, Năm)'
+    # Fallback to first column that contains 'year' or 'Năm'
+    for col in statement_df.columns:
+        if isinstance(col, tuple):
+            name = col[-1].lower()
+            if 'year' in name or 'năm' in name:
+                return col
+    return 'yearReport'  # Default fallback
+
+async def fetch_statement_frame(symbol, statement_type):
+    """Fetch the multi-year statement DataFrame and its year column, shared by every year lookup"""
+    frame_key = (symbol, statement_type)
+    frame = statement_frame_cache.get(frame_key)
+    if frame is not None:
+        logger.debug(f"Frame cache hit: {symbol} {statement_type}")
+        return frame
+    
+    method_name = STATEMENT_METHODS.get(statement_type)
+    if method_name is None:
+        return None
+    
+    # Run blocking operation in a thread pool
+    client = await asyncio.to_thread(lambda: Vnstock().stock(symbol=symbol, source="VCI"))
+    fetch = getattr(client.finance, method_name)
+    statement_df = await asyncio.to_thread(fetch, period=DEFAULT_PERIOD)
+    year_column = ratio_year_column(statement_df) if statement_type == "ratio" else 'yearReport'
+    
+    frame = (statement_df, year_column)
+    statement_frame_cache[frame_key] = frame
+    return frame
+
 async def get_financial_data(symbol, statement_type, year=None):
     """Get financial data for a specific year"""
     cache_key = f"{symbol}_{statement_type}"
@@ -239,33 +300,10 @@ async def get_financial_data(symbol, statement_type, year=None):
     # Fetch fresh data
     logger.info(f"Fetching {symbol} {statement_type}")
     try:
-        # Run blocking operation in a thread pool
-        client = await asyncio.to_thread(lambda: Vnstock().stock(symbol=symbol, source="VCI"))
-        
-        if statement_type == "balance_sheet":
-            statement_df = await asyncio.to_thread(lambda: client.finance.balance_sheet(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "income_statement":
-            statement_df = await asyncio.to_thread(lambda: client.finance.income_statement(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "cash_flow":
-            statement_df = await asyncio.to_thread(lambda: client.finance.cash_flow(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "ratio":
-            statement_df = await asyncio.to_thread(lambda: client.finance.ratio(period=DEFAULT_PERIOD))
-            # For ratio, the year might be in '(Meta, Năm)' column based on the provided structure
-            if '(Meta, Năm)' in statement_df.columns:
-                year_column = '(Meta, Năm)'
-            else:
-                # Fallback to first column that contains 'year' or 'Năm'
-                for col in statement_df.columns:
-                    if isinstance(col, tuple) and ('year' in col[-1].lower() or 'năm' in col[-1].lower()):
-                        year_column = col
-                        break
-                else:
-                    year_column = 'yearReport'  # Default fallback
-        else:
+        frame = await fetch_statement_frame(symbol, statement_type)
+        if frame is None:
             return None
+        statement_df, year_column = frame
         
         # Process based on request type
         if year:
@@ -308,7 +346,6 @@ async def get_financial_data(symbol, statement_type, year=None):
         
     except Exception as e:
         logger.error(f"{symbol} {statement_type} error: {e}")
-        import traceback
         logger.error(traceback.format_exc())
         return None
 
@@ -331,33 +368,10 @@ async def get_financial_ratios(symbol, year=None):
 async def get_available_years(symbol, statement_type="income_statement"):
     """Get list of available years for the given symbol"""
     try:
-        # Run blocking operation in a thread pool
-        client = await asyncio.to_thread(lambda: Vnstock().stock(symbol=symbol, source="VCI"))
-        
-        if statement_type == "balance_sheet":
-            statement_df = await asyncio.to_thread(lambda: client.finance.balance_sheet(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "income_statement":
-            statement_df = await asyncio.to_thread(lambda: client.finance.income_statement(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "cash_flow":
-            statement_df = await asyncio.to_thread(lambda: client.finance.cash_flow(period=DEFAULT_PERIOD))
-            year_column = 'yearReport'
-        elif statement_type == "ratio":
-            statement_df = await asyncio.to_thread(lambda: client.finance.ratio(period=DEFAULT_PERIOD))
-            # For ratio, check if '(Meta, Năm)' exists
-            if '(Meta, Năm)' in statement_df.columns:
-                year_column = '(Meta, Năm)'
-            else:
-                # Try to find year column in MultiIndex columns
-                for col in statement_df.columns:
-                    if isinstance(col, tuple) and ('year' in col[-1].lower() or 'năm' in col[-1].lower()):
-                        year_column = col
-                        break
-                else:
-                    year_column = 'yearReport'  # Default fallback
-        else:
+        frame = await fetch_statement_frame(symbol, statement_type)
+        if frame is None:
             return []
+        statement_df, year_column = frame
             
         # Extract years
         years = statement_df[year_column].unique().tolist()
@@ -369,17 +383,18 @@ async def get_available_years(symbol, statement_type="income_statement"):
 
 async def get_stock_information(symbol, year=None):
     """Get comprehensive stock information for a specific year"""
-    price = await get_stock_price(symbol)
-    overview = await get_company_overview(symbol)
+    # Each fetch is an independent network round trip, so run them all at once
+    price, overview, balance_sheet_md, income_md, cash_flow_md, ratios_md = await asyncio.gather(
+        get_stock_price(symbol),
+        get_company_overview(symbol),
+        get_balance_sheet(symbol, year=year),
+        get_income_statement(symbol, year=year),
+        get_cash_flow(symbol, year=year),
+        get_financial_ratios(symbol, year=year),
+    )
     
     year_info = f" (Year: {year})" if year else " (Latest year)"
     
-    # Get each statement for the specified year
-    balance_sheet_md = await get_balance_sheet(symbol, year=year)
-    income_md = await get_income_statement(symbol, year=year)
-    cash_flow_md = await get_cash_flow(symbol, year=year)
-    ratios_md = await get_financial_ratios(symbol, year=year)
-    
     return f"""[STOCK INFORMATION]{year_info}
 Symbol: {symbol}
 Price: {price}
@@ -400,9 +415,6 @@ Price: {price}
 {ratios_md}
 """
 
-from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
-
 async def get_stock_information_by_year(symbol: str, year: Optional[int] = None) -> str:
     """
     Get stock information for a specific company and year.
@@ -424,8 +436,8 @@ def get_stock_information_by_year_sync(symbol: str, year: Optional[int] = None)
 
 # Initialize and clean up
 def initialize():
-    global finance_data_cache
-    finance_data_cache = load_cache()
+    # Fill the shared cache in place so modules that imported it see the loaded entries
+    finance_data_cache.update(load_cache())
     logger.info("Cache loaded")
 
 # Register exit handler to save cache
@@ -457,5 +469,4 @@ if __name__ == "__main__":
                 
         except Exception as e:
             logger.error(f"Error getting data for {symbol}: {e}")
-            import traceback
             logger.error(traceback.format_exc())
\ No newline at end of file
@@ -17,6 +17,34 @@ from src.services.tools.data_extractor import DataExtractor
 from src.api.v1.schemas import FinancialReport
 from src.core.config import settings
 
+# Whitespace cleanup applied once to extracted text before it is stored
+_ODD_SPACES = re.compile(r"[\u00A0\f\v]")
+_TRAILING_SPACES = re.compile(r"[ \t]+$", re.MULTILINE)
+_EXTRA_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_report_text(text: str) -> str:
+    """
+    Normalize whitespace left over from PDF extraction.
+    
+    Replaces non-breaking spaces and form feeds, strips trailing spaces and
+    collapses runs of blank lines, keeping leading indentation and table rows intact.
+    
+    Args:
+        text: Extracted report text
+        
+    Returns:
+        Normalized text
+    """
+    text = _ODD_SPACES.sub(" ", text)
+    text = _TRAILING_SPACES.sub("", text)
+    return _EXTRA_BLANK_LINES.sub("\n\n", text).strip()
+
+
+def read_report_text(file_path: Path) -> str:
+    """Read an extracted report and normalize it (blocking, run in a thread)."""
+    return normalize_report_text(file_path.read_text(encoding="utf-8"))
+
 class DocumentInjector:
     """
     Service for processing financial documents from raw_pdf folder and injecting them into the database.
@@ -99,24 +127,26 @@ class DocumentInjector:
                 return stats
             
             # Check if file has already been processed
-            expected_output_file = self.converted_file_dir / f"{os.path.splitext(filename)[0]}.txt"
-            if expected_output_file.exists():
+            existing_extraction = await asyncio.to_thread(
+                self.data_extractor.find_latest_extraction, str(file_path), str(self.converted_file_dir)
+            )
+            if existing_extraction:
                 logger.info(f"File {filename} has already been processed, using existing extraction")
-                processed_file_path = expected_output_file
+                # Read and normalize the extracted content off the event loop; reports
+                # can be several MB, and cleaning once here keeps every later prompt smaller
+                logger.debug(f"Reading extracted content from: {existing_extraction}")
+                content = await asyncio.to_thread(read_report_text, existing_extraction)
             else:
                 # Extract text from PDF
                 logger.info(f"Extracting text from PDF: {file_path}")
-                extraction_result = self.data_extractor.extract_text_from_pdf(str(file_path))
+                extraction_result = await self.data_extractor.aextract_text_from_pdf(str(file_path))
                 if not extraction_result["success"]:
                     logger.error(f"Failed to extract text from {filename}: {extraction_result['message']}")
                     stats["failed"] += 1
                     return stats
-                processed_file_path = extraction_result["processed_file_path"]
-            
-            # Read the extracted content
-            logger.debug(f"Reading extracted content from: {processed_file_path}")
-            with open(processed_file_path, "r", encoding="utf-8") as f:
-                content = f.read()
+                # The extractor already returns the merged text; normalize it
+                # directly instead of reading the file it just wrote back again
+                content = await asyncio.to_thread(normalize_report_text, extraction_result["content"])
             
             # Create financial report object
             financial_report = FinancialReport(
@@ -1,6 +1,7 @@
 import asyncio
 import aiohttp
 import json
+import orjson
 from bs4 import BeautifulSoup
 import os
 from dotenv import load_dotenv
@@ -8,7 +9,7 @@ from src.core.config import settings
 import concurrent.futures
 from functools import lru_cache
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import cachetools.func
 import re
 from loguru import logger
@@ -24,8 +25,14 @@ GOOGLE_CSE_ID = settings.SEARCH_ENGINE_CSE_ID
 CONNECTION_TIMEOUT = 5  # seconds
 CONTENT_TIMEOUT = 10    # seconds
 MAX_CONTENT_LENGTH = 3000  # characters
+MAX_HTML_BYTES = 2 * 1024 * 1024  # stop downloading a page after this much HTML
+HTML_CHUNK_SIZE = 64 * 1024  # bytes read from the response stream at a time
 CACHE_TTL = 3600  # Cache time-to-live in seconds (1 hour)
 MAX_CONCURRENT_REQUESTS = 10  # Limit concurrent requests
+# Patterns compiled once at import rather than looked up in re's cache per call
+_WHITESPACE_RUN = re.compile(r'\s+')
+# File extensions that are never HTML pages; matched with a plain suffix check
+NON_HTML_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip', '.tar')
 REQUEST_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
@@ -74,8 +81,8 @@ async def search_google(query, num_results=10):
                 logger.warning(f"Google search API returned status {response.status} for query: {query}")
                 return []
             
-            # Parse the response
-            results = await response.json()
+            # Parse the raw body with orjson; no intermediate str decode
+            results = orjson.loads(await response.read())
             
             # Check if there are search results
             if 'items' not in results:
@@ -98,6 +105,50 @@ async def search_google(query, num_results=10):
         logger.error(f"Error in Google search for query '{query}': {str(e)}")
         return []
 
+def parse_html_content(html_content: Union[str, bytes]) -> str:
+    """
+    Extract the readable text from an HTML page.
+    
+    Args:
+        html_content (str | bytes): Raw HTML of the page; bytes are decoded by
+            BeautifulSoup from the page's <meta> charset or detected encoding
+        
+    Returns:
+        str: Whitespace-normalized text, truncated to MAX_CONTENT_LENGTH
+    """
+    # Use a faster parser
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Remove script, style, and other irrelevant elements
+    for element in soup(['script', 'style', 'meta', 'noscript', 'header', 'footer', 'nav']):
+        element.decompose()
+    
+    # Extract only main content areas
+    main_content = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'article', 'section', 'div.content'])
+    
+    # If we found specific content elements, use them; otherwise, use the whole body
+    if main_content:
+        # Collect only until past the limit instead of joining the whole page
+        # and then discarding all but the first MAX_CONTENT_LENGTH characters
+        pieces = []
+        length = -1  # no separator before the first piece
+        for element in main_content:
+            piece = _WHITESPACE_RUN.sub(' ', element.get_text(strip=True))
+            if not piece:
+                continue
+            pieces.append(piece)
+            length += len(piece) + 1
+            if length > MAX_CONTENT_LENGTH:
+                break
+        text = ' '.join(pieces)
+    else:
+        text = _WHITESPACE_RUN.sub(' ', soup.get_text(separator=' ', strip=True))
+    
+    # Truncate the whitespace-normalized text
+    text = text[:MAX_CONTENT_LENGTH] + ("..." if len(text) > MAX_CONTENT_LENGTH else "")
+    
+    return text
+
 async def extract_content_from_url(url: str) -> str:
     """
     Extract content from a given URL asynchronously with optimizations.
@@ -114,7 +165,7 @@ async def extract_content_from_url(url: str) -> str:
         return "Invalid URL format"
     
     # Check for file types that are not HTML (images, PDFs, etc.)
-    if re.search(r'\.(jpg|jpeg|png|gif|pdf|doc|docx|xls|xlsx|zip|tar)$', url, re.IGNORECASE):
+    if url.lower().endswith(NON_HTML_EXTENSIONS):
         logger.warning(f"URL points to a non-HTML file: {url}")
         return "URL points to a non-HTML file"
     
@@ -137,28 +188,32 @@ async def extract_content_from_url(url: str) -> str:
                 logger.warning(f"Content type is not HTML: {content_type} for URL: {url}")
                 return ""
             
-            # Get the HTML content with a streaming approach
-            html_content = await response.text(errors='replace')
-            
-            # Use a faster parser
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Stream the body and stop at MAX_HTML_BYTES: only MAX_CONTENT_LENGTH
+            # characters are kept, so there is no point buffering huge pages
+            chunks = []
+            received = 0
+            truncated = False
+            async for chunk in response.content.iter_chunked(HTML_CHUNK_SIZE):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received >= MAX_HTML_BYTES:
+                    logger.debug(f"Truncated HTML download at {received} bytes for {url}")
+                    truncated = True
+                    break
+            html_content = b"".join(chunks)
+            if truncated:
+                # Cut back to the last line break so a multi-byte character split
+                # by the cap doesn't derail encoding detection
+                html_content = html_content[:html_content.rfind(b"\n") + 1] or html_content
+            if response.charset:
+                # The Content-Type charset is authoritative
+                html_content = html_content.decode(response.charset, errors='replace')
+            # Otherwise BeautifulSoup decodes the bytes from the page's <meta> charset,
+            # falling back to detecting the encoding
             
-            # Remove script, style, and other irrelevant elements
-            for element in soup(['script', 'style', 'meta', 'noscript', 'header', 'footer', 'nav']):
-                element.decompose()
-            
-            # Extract only main content areas
-            main_content = soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'article', 'section', 'div.content'])
-            
-            # If we found specific content elements, use them; otherwise, use the whole body
-            if main_content:
-                text = ' '.join(element.get_text(strip=True) for element in main_content)
-            else:
-                text = soup.get_text(separator=' ', strip=True)
-            
-            # Clean up text effectively
-            text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
-            text = text[:MAX_CONTENT_LENGTH] + ("..." if len(text) > MAX_CONTENT_LENGTH else "")
+            # Parsing is CPU-bound; keep it off the event loop so other
+            # downloads and requests keep making progress
+            text = await asyncio.to_thread(parse_html_content, html_content)
             
             logger.debug(f"Successfully extracted {len(text)} characters from {url}")
             return text
@@ -229,6 +284,11 @@ async def search_information(search_query: str) -> str:
     Returns:
         str: Organized text content from the top search results
     """
+    # The model occasionally calls the tool with an empty query; skip the search API
+    if not search_query or not search_query.strip():
+        logger.warning("Empty search query, skipping search")
+        return "No results found for the given query."
+    
     logger.info(f"Searching for information: {search_query}")
     num_results = 10
     # Check cache first
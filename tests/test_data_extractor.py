@@ -0,0 +1,94 @@
+import asyncio
+import io
+
+import pikepdf
+import pytest
+
+from src.services.llm_cache import LLMResponseCache
+from src.services.tools import data_extractor
+from src.services.tools.data_extractor import DataExtractor
+
+TOTAL_PAGES = 8
+
+
+def make_pdf(path, total_pages=TOTAL_PAGES):
+    """Write a PDF whose page n is 100 + n points wide, so a fake model can tell pages apart."""
+    pdf = pikepdf.new()
+    for number in range(1, total_pages + 1):
+        pdf.add_blank_page(page_size=(100 + number, 100))
+    pdf.save(path)
+
+
+class FakeLLMService:
+    """Stands in for LLMService; returns 'p<n>' for each page except the failing ones."""
+
+    def __init__(self, failing_pages=()):
+        self.failing_pages = set(failing_pages)
+        self.calls = 0
+
+    async def agenerate_content(self, prompt, content=None, mime_type=None, system_instruction=None, file_path=None):
+        self.calls += 1
+        with pikepdf.open(io.BytesIO(content)) as pdf:
+            numbers = [int(page.mediabox[2]) - 100 for page in pdf.pages]
+        if len(numbers) == 1:
+            number = numbers[0]
+            return None if number in self.failing_pages else f"p{number}"
+        return "".join(
+            f"<PAGE idx='{number}'>p{number}</PAGE>" for number in numbers if number not in self.failing_pages
+        )
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_extractor.settings, "CONVERTED_FILE_DIR", tmp_path / "converted")
+    (tmp_path / "converted").mkdir()
+    extractor = DataExtractor(model_name="test-model", batch_pages=4)
+    extractor.response_cache = LLMResponseCache(tmp_path / "cache")
+    return extractor
+
+
+def test_failed_page_makes_extraction_fail_and_is_not_cached(extractor, tmp_path):
+    pdf_path = str(tmp_path / "REPORT.pdf")
+    make_pdf(pdf_path)
+
+    result = asyncio.run(
+        extractor.aextract_text_from_pdf(pdf_path, llm_service=FakeLLMService(failing_pages={4}))
+    )
+
+    assert result["success"] is False
+    assert extractor.response_cache.get(extractor._document_key(pdf_path)) is None
+    assert list((tmp_path / "converted").iterdir()) == []
+    assert extractor.find_latest_extraction(pdf_path) is None
+
+
+def test_complete_extraction_is_published_and_cached(extractor, tmp_path):
+    pdf_path = str(tmp_path / "REPORT.pdf")
+    make_pdf(pdf_path)
+
+    result = asyncio.run(extractor.aextract_text_from_pdf(pdf_path, llm_service=FakeLLMService()))
+
+    assert result["success"] is True
+    assert result["pages_processed"] == TOTAL_PAGES
+    assert result["content"] == "\n".join(f"p{number}" for number in range(1, TOTAL_PAGES + 1))
+    assert str(extractor.find_latest_extraction(pdf_path)) == result["processed_file_path"]
+
+    # A second run is served from the document cache without calling the model
+    service = FakeLLMService()
+    again = asyncio.run(extractor.aextract_text_from_pdf(pdf_path, llm_service=service))
+    assert again["content"] == result["content"]
+    assert service.calls == 0
+
+
+def test_short_document_is_sent_whole_and_served_from_cache(extractor, tmp_path):
+    pdf_path = str(tmp_path / "SHORT.pdf")
+    make_pdf(pdf_path, total_pages=3)
+
+    service = FakeLLMService()
+    result = asyncio.run(extractor.aextract_text_from_pdf(pdf_path, llm_service=service))
+    assert result["success"] is True
+    assert service.calls == 1
+
+    service = FakeLLMService()
+    again = asyncio.run(extractor.aextract_text_from_pdf(pdf_path, llm_service=service))
+    assert again["content"] == result["content"]
+    assert service.calls == 0